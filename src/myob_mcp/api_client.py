@@ -2,18 +2,94 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable
 
 import httpx
+import orjson
 
 from .auth import MyobAuth
-from .cache import TTLCache
+from .cache import CACHE_TTL_ETAG, TTLCache, make_key
 from .config import MyobConfig
 
 logger = logging.getLogger(__name__)
 
 API_BASE_URL = "https://api.myob.com/accountright"
 
+# Retry policy: full-jitter exponential backoff. Writes get fewer retries so a
+# timed-out POST/PUT that MYOB actually processed is not repeated too often.
+# These budgets cover transient failures (network errors, 429, 5xx) only; a
+# 401 always gets one token refresh and resend on top of them.
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+RETRY_AFTER_MAX_DELAY = 60.0
+MAX_RETRIES_IDEMPOTENT = 3
+MAX_RETRIES_WRITE = 1
+_IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+# Maps one page of raw collection items to the items to keep, one for one
+PageTransform = Callable[[list[dict[str, Any]]], list[Any]]
+# A cacheable fetch: the result and the TTL to cache it for (None: don't)
+CacheableFetch = Callable[[], Awaitable[tuple[Any, float | None]]]
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the pooled HTTP/2 client shared by the API client and OAuth."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=40,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+    )
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2**attempt)))
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _ttl_from_cache_control(value: str | None, ttl: float | None) -> float | None:
+    """Cap ``ttl`` by a response's Cache-Control header.
+
+    ``no-store`` disables caching and a shorter ``max-age`` wins; without
+    either directive (or without a ``ttl``) the caller's TTL stands.
+    """
+    if not value or not ttl:
+        return ttl
+    for directive in value.split(","):
+        name, _, arg = directive.strip().partition("=")
+        name = name.lower()
+        if name == "no-store":
+            return None
+        if name == "max-age":
+            try:
+                max_age = float(arg.strip().strip('"'))
+            except ValueError:
+                continue
+            ttl = min(ttl, max(0.0, max_age))
+    return ttl
+
 
 class MyobApiError(Exception):
     def __init__(self, status_code: int, message: str, response_body: str = "") -> None:
@@ -26,19 +102,49 @@ class MyobApiError(Exception):
         super().__init__(detail)
 
 
+def _page_items(result: Any) -> list[dict[str, Any]]:
+    """Extract the item list from one page of a MYOB collection response."""
+    # MYOB returns items as a JSON array or in an Items field. Pages are
+    # freshly decoded and never shared, so the list is returned as-is rather
+    # than copied.
+    if isinstance(result, list):
+        return result
+    if isinstance(result, dict) and "Items" in result:
+        return result["Items"]
+    return [result] if result else []
+
+
 class MyobApiClient:
     def __init__(
-        self, config: MyobConfig, auth: MyobAuth, cache: TTLCache
+        self,
+        config: MyobConfig,
+        auth: MyobAuth,
+        cache: TTLCache,
+        http_client: httpx.AsyncClient | None = None,
     ) -> None:
         self.config = config
         self.auth = auth
         self.cache = cache
-        self._client: httpx.AsyncClient | None = None
+        self._client: httpx.AsyncClient = (
+            http_client if http_client is not None else create_http_client()
+        )
+        # Background stale-while-revalidate refreshes, keyed by cache key
+        self._revalidating: dict[str, asyncio.Task[None]] = {}
+        # Uncached GETs currently on the wire, so concurrent identical
+        # lookups (e.g. an agent fanning out get_contact calls) share one
+        self._inflight: dict[tuple[Any, ...], asyncio.Task[Any]] = {}
+        # Everything except Authorization is fixed for the server's lifetime
+        self._static_headers: dict[str, str] = {
+            "x-myobapi-key": config.client_id,
+            "x-myobapi-version": "v2",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
 
-    def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=30.0)
-        return self._client
+    def _reopen_client(self) -> None:
+        # Only reached on request errors, keeping the happy path branch-free
+        if self._client.is_closed:
+            self._client = create_http_client()
 
     def _build_url(self, path: str, company_file_id: str | None) -> str:
         if company_file_id:
@@ -62,14 +168,47 @@ class MyobApiClient:
         return cfid
 
     async def _build_headers(self) -> dict[str, str]:
-        token = await self.auth.get_valid_token()
-        return {
-            "Authorization": f"Bearer {token}",
-            "x-myobapi-key": self.config.client_id,
-            "x-myobapi-version": "v2",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-        }
+        headers = self._static_headers.copy()
+        # Fresh token: no await, so no extra trip through the event loop
+        headers["Authorization"] = (
+            self.auth.get_bearer_sync() or await self.auth.get_bearer()
+        )
+        return headers
+
+    def _cache_lookup(
+        self,
+        cache_key: str,
+        cache_ttl: float | None,
+        stale_ttl: float | None,
+        fetch: CacheableFetch,
+    ) -> Any | None:
+        """Read ``cache_key``, scheduling a background refresh if it is stale."""
+        if not stale_ttl:
+            return self.cache.get(cache_key)
+        value, is_stale = self.cache.get_swr(cache_key)
+        if is_stale and cache_key not in self._revalidating:
+            self._revalidating[cache_key] = asyncio.create_task(
+                self._revalidate(cache_key, cache_ttl, stale_ttl, fetch)
+            )
+        return value
+
+    async def _revalidate(
+        self,
+        cache_key: str,
+        cache_ttl: float | None,
+        stale_ttl: float | None,
+        fetch: CacheableFetch,
+    ) -> None:
+        try:
+            result, ttl = await fetch()
+            if ttl:
+                self.cache.set(cache_key, result, ttl, stale_ttl)
+            logger.debug("Revalidated stale cache entry: %s", cache_key)
+        except Exception as e:
+            # The stale value keeps being served until stale_ttl runs out
+            logger.warning("Background refresh of %s failed: %s", cache_key, e)
+        finally:
+            self._revalidating.pop(cache_key, None)
 
     async def request(
         self,
@@ -82,64 +221,176 @@ class MyobApiClient:
         json_body: dict[str, Any] | None = None,
         cache_key: str | None = None,
         cache_ttl: float | None = None,
+        stale_ttl: float | None = None,
+        conditional: bool = False,
     ) -> Any:
+        """Send a request to the company file API.
+
+        With ``conditional=True`` a GET remembers the response's ETag and
+        revalidates with ``If-None-Match`` next time, reusing the stored body
+        on a 304 instead of downloading and decoding it again.
+
+        The result may be shared: it can be a cached value, the body stored
+        with an ETag, or the same object handed to concurrent callers of an
+        identical GET. Callers must treat it as read-only and copy before
+        changing anything.
+        """
+        # MYOB only returns the created/updated entity when returnBody=true
+        if method.upper() in ("POST", "PUT"):
+            params = dict(params or {})
+            params["returnBody"] = "true"
+
+        cfid = self._resolve_company_file_id(
+            company_file_id, required=require_company_file
+        )
+        url = self._build_url(path, cfid)
+
+        async def fetch() -> tuple[Any, float | None]:
+            etag_key = (
+                make_key("etag", url, tuple(sorted((params or {}).items())))
+                if conditional
+                else None
+            )
+            response_headers: dict[str, str] = {}
+            result = await self._raw_request(
+                method, url, path, params=params, json_body=json_body,
+                etag_key=etag_key, response_headers=response_headers,
+            )
+            return result, _ttl_from_cache_control(
+                response_headers.get("Cache-Control"), cache_ttl
+            )
+
         # Check cache first
         if cache_key:
-            cached = self.cache.get(cache_key)
+            cached = self._cache_lookup(cache_key, cache_ttl, stale_ttl, fetch)
             if cached is not None:
                 logger.debug("Cache hit: %s", cache_key)
                 return cached
 
-        cfid = self._resolve_company_file_id(
-            company_file_id, required=require_company_file
-        )
-        url = self._build_url(path, cfid)
+        async def fetch_and_store() -> Any:
+            result, ttl = await fetch()
+            if cache_key and ttl:
+                self.cache.set(cache_key, result, ttl, stale_ttl)
+            return result
 
-        # MYOB only returns the created/updated entity when returnBody=true
-        if method.upper() in ("POST", "PUT"):
-            params = dict(params or {})
-            params["returnBody"] = "true"
+        if method.upper() == "GET":
+            # Keyed on the resolved URL, so an explicit default company file
+            # and None share a fetch, and on every option that changes what
+            # the fetch caches or how it validates
+            return await self._coalesced(
+                (
+                    url,
+                    tuple(sorted((params or {}).items())),
+                    cache_key,
+                    cache_ttl,
+                    stale_ttl,
+                    conditional,
+                ),
+                fetch_and_store,
+            )
+        return await fetch_and_store()
 
-        max_retries = 3
-        for attempt in range(max_retries + 1):
-            headers = await self._build_headers()
-            client = self._get_client()
+    async def _coalesced(
+        self, key: tuple[Any, ...], fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run ``fetch`` once for all concurrent callers with the same ``key``.
+
+        Callers share the decoded result, just as they share cached values.
+        The fetch is shielded so one caller being cancelled doesn't fail the
+        others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget_inflight(key, t))
+        return await asyncio.shield(task)
+
+    def _forget_inflight(self, key: tuple[Any, ...], task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _raw_request(
+        self,
+        method: str,
+        url: str,
+        path: str,
+        *,
+        params: dict[str, str] | None = None,
+        json_body: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        etag_key: str | None = None,
+        response_headers: dict[str, str] | None = None,
+    ) -> Any:
+        """Send one logical request to a fully built URL, with retries.
+
+        ``headers`` may be shared across calls (e.g. all pages of one
+        paged fetch); they are rebuilt only after a 401 forces a refresh.
+        ``etag_key`` names the cache entry holding the last ``(etag, body)``
+        for a conditional GET. If ``response_headers`` is given, the final
+        response's Cache-Control header is copied into it.
+        """
+        max_retries = (
+            MAX_RETRIES_IDEMPOTENT
+            if method.upper() in _IDEMPOTENT_METHODS
+            else MAX_RETRIES_WRITE
+        )
+        # Encode the body once, with orjson, rather than per attempt
+        content = orjson.dumps(json_body) if json_body is not None else None
+        validated = self.cache.get(etag_key) if etag_key else None
+        attempt = 0
+        refreshed = False
+        resent_unconditionally = False
+        while True:
+            if headers is None:
+                headers = await self._build_headers()
+                if validated is not None:
+                    headers["If-None-Match"] = validated[0]
 
             try:
-                resp = await client.request(
-                    method, url, headers=headers, params=params, json=json_body
+                resp = await self._client.request(
+                    method, url, headers=headers, params=params, content=content
                 )
             except httpx.RequestError as e:
+                self._reopen_client()
                 if attempt < max_retries:
-                    wait = 0.5 * (2**attempt)
+                    wait = _backoff_delay(attempt)
                     logger.warning("Request error (attempt %d): %s", attempt + 1, e)
                     await asyncio.sleep(wait)
+                    attempt += 1
                     continue
                 raise MyobApiError(0, f"Request failed: {e}")
 
-            if resp.status_code == 401 and attempt < max_retries:
+            if resp.status_code == 401 and not refreshed:
+                # A rejected token is not a transient failure, so the resend
+                # doesn't use up the retry budget (a write still gets its one)
+                refreshed = True
                 logger.info("Got 401, refreshing token and retrying")
-                await self.auth.refresh_access_token()
+                await self.auth.refresh_rejected_token(headers["Authorization"])
+                headers = None
                 continue
 
             if resp.status_code == 429 and attempt < max_retries:
-                retry_after = resp.headers.get("Retry-After")
-                if retry_after:
-                    try:
-                        wait = int(retry_after)
-                    except ValueError:
-                        wait = 0.5 * (2**attempt)
+                retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    wait = min(retry_after, RETRY_AFTER_MAX_DELAY)
+                    source = "Retry-After"
                 else:
-                    wait = 0.5 * (2**attempt)
-                wait = min(wait, 60)
-                logger.warning("Rate limited, waiting %.1fs", wait)
+                    wait = _backoff_delay(attempt)
+                    source = "backoff"
+                logger.info("Rate limited, waiting %.1fs (%s)", wait, source)
                 await asyncio.sleep(wait)
+                attempt += 1
                 continue
 
             if resp.status_code >= 500 and attempt < max_retries:
-                wait = 0.5 * (2**attempt)
+                wait = _backoff_delay(attempt)
                 logger.warning("Server error %d, retrying in %.1fs", resp.status_code, wait)
                 await asyncio.sleep(wait)
+                attempt += 1
                 continue
 
             if resp.status_code >= 400:
@@ -153,21 +404,42 @@ class MyobApiClient:
                     resp.text,
                 )
 
+            if response_headers is not None:
+                response_headers["Cache-Control"] = resp.headers.get(
+                    "Cache-Control", ""
+                )
+
+            if resp.status_code == 304:
+                if validated is not None:
+                    logger.debug("Not modified: %s", url)
+                    return validated[1]
+                # Nothing to reuse (e.g. the body was evicted), so ask once
+                # more without a validator rather than decode an empty body
+                if not resent_unconditionally:
+                    resent_unconditionally = True
+                    logger.info("304 without a stored body, resending: %s", url)
+                    headers = {
+                        k: v for k, v in headers.items() if k != "If-None-Match"
+                    }
+                    continue
+                raise MyobApiError(
+                    304, f"{method} {path} returned 304 with no stored body"
+                )
+
             # 200-299 success
             if resp.status_code == 204:
                 result = None
             else:
-                result = resp.json()
+                result = orjson.loads(resp.content)
+            if etag_key:
+                etag = resp.headers.get("ETag")
+                if etag:
+                    self.cache.set(etag_key, (etag, result), CACHE_TTL_ETAG)
 
             logger.debug("Response from %s: status=%d body_type=%s", url, resp.status_code, type(result).__name__)
 
-            if cache_key and cache_ttl:
-                self.cache.set(cache_key, result, cache_ttl)
-
             return result
 
-        raise MyobApiError(0, "Max retries exceeded")
-
     async def request_paged(
         self,
         path: str,
@@ -178,54 +450,147 @@ class MyobApiClient:
         top: int | None = None,
         cache_key: str | None = None,
         cache_ttl: float | None = None,
-    ) -> list[dict[str, Any]]:
+        stale_ttl: float | None = None,
+        concurrency: int = 4,
+        transform: PageTransform | None = None,
+    ) -> list[Any]:
+        """Fetch every page of a collection, up to ``max_items`` items.
+
+        ``transform`` is applied to each page's items as the page arrives,
+        so raw pages can be freed straight away and only the transformed
+        items are kept and cached. It must return one output per input item.
+        Callers sharing a ``cache_key`` must pass equivalent transforms.
+        Concurrent calls only share a fetch when they pass the same transform
+        object, so pass a long-lived function rather than a fresh closure.
+        Like ``request`` results, the returned list may be shared.
+        """
+        url = self._build_url(path, self._resolve_company_file_id(company_file_id))
+
+        async def fetch() -> tuple[list[Any], float | None]:
+            response_headers: dict[str, str] = {}
+            items = await self._fetch_paged(
+                url,
+                path,
+                params=params,
+                max_items=max_items,
+                top=top,
+                concurrency=concurrency,
+                transform=transform,
+                response_headers=response_headers,
+            )
+            return items, _ttl_from_cache_control(
+                response_headers.get("Cache-Control"), cache_ttl
+            )
+
         # Check cache first
         if cache_key:
-            cached = self.cache.get(cache_key)
+            cached = self._cache_lookup(cache_key, cache_ttl, stale_ttl, fetch)
             if cached is not None:
                 return cached
 
+        async def fetch_and_store() -> list[Any]:
+            all_items, ttl = await fetch()
+            if cache_key and ttl:
+                self.cache.set(cache_key, all_items, ttl, stale_ttl)
+            return all_items
+
+        # Concurrent identical list calls (e.g. a cache-miss race) share one
+        # set of page fetches. The transform is part of the key: callers with
+        # different transforms need differently shaped (or recorded) results.
+        return await self._coalesced(
+            (
+                "paged",
+                url,
+                tuple(sorted((params or {}).items())),
+                max_items,
+                top,
+                cache_key,
+                cache_ttl,
+                stale_ttl,
+                transform,
+            ),
+            fetch_and_store,
+        )
+
+    async def _fetch_paged(
+        self,
+        url: str,
+        path: str,
+        *,
+        params: dict[str, str] | None,
+        max_items: int,
+        top: int | None,
+        concurrency: int,
+        transform: PageTransform | None,
+        response_headers: dict[str, str] | None = None,
+    ) -> list[Any]:
+        """Fetch the pages; the first page's headers go to ``response_headers``."""
         page_size = top if top is not None else 400
         if top is not None:
             max_items = top
 
-        all_items: list[dict[str, Any]] = []
-        page_params = dict(params or {})
-        page_params["$top"] = str(page_size)
-        skip = 0
+        # Build the headers once for every page
+        headers = await self._build_headers()
 
-        while True:
+        base_params = dict(params or {})
+        base_params["$top"] = str(page_size)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch_page(
+            skip: int, page_headers: dict[str, str] | None = None
+        ) -> tuple[Any, list[Any]]:
+            """Return one page's ``Count`` (if any) and its transformed items."""
+            page_params = dict(base_params)
             if skip > 0:
                 page_params["$skip"] = str(skip)
-
-            result = await self.request(
-                "GET",
-                path,
-                company_file_id=company_file_id,
-                params=page_params,
-            )
-
-            # MYOB returns items as a JSON array or in an Items field
-            if isinstance(result, list):
-                items = result
-            elif isinstance(result, dict) and "Items" in result:
-                items = result["Items"]
+            async with semaphore:
+                page = await self._raw_request(
+                    "GET", url, path, params=page_params, headers=headers,
+                    response_headers=page_headers,
+                )
+            items = _page_items(page)
+            if transform is not None:
+                items = transform(items)
+            return (page.get("Count") if isinstance(page, dict) else None), items
+
+        count, all_items = await fetch_page(0, response_headers)
+
+        if len(all_items) >= page_size and len(all_items) < max_items:
+            if isinstance(count, int):
+                # Total is known up front, so fetch the remaining pages at once
+                skips = range(page_size, min(count, max_items), page_size)
+                pages = await asyncio.gather(*(fetch_page(s) for s in skips))
+                for _, items in pages:
+                    all_items.extend(items)
             else:
-                items = [result] if result else []
-
-            all_items.extend(items)
-
-            if len(items) < page_size or len(all_items) >= max_items:
-                break
-
-            skip += page_size
-
-        if cache_key and cache_ttl:
-            self.cache.set(cache_key, all_items, cache_ttl)
+                # No total: speculatively prefetch `concurrency` pages at a time
+                # and stop at the first short page, discarding anything after it.
+                skip = page_size
+                done = False
+                while not done and skip < max_items:
+                    skips = [
+                        s
+                        for s in range(
+                            skip, skip + page_size * max(1, concurrency), page_size
+                        )
+                        if s < max_items
+                    ]
+                    pages = await asyncio.gather(*(fetch_page(s) for s in skips))
+                    for _, items in pages:
+                        all_items.extend(items)
+                        if len(items) < page_size:
+                            done = True
+                            break
+                    skip = skips[-1] + page_size
 
         return all_items
 
     async def close(self) -> None:
-        if self._client and not self._client.is_closed:
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        self._revalidating.clear()
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+        if not self._client.is_closed:
             await self._client.aclose()
-            self._client = None
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import html
 import logging
+import os
 import secrets
 import time
 from pathlib import Path
@@ -10,6 +11,7 @@ from typing import Any
 from urllib.parse import parse_qs, urlencode, urlparse
 
 import httpx
+import orjson
 
 from .config import MyobConfig
 
@@ -18,16 +20,44 @@ logger = logging.getLogger(__name__)
 AUTH_URL = "https://secure.myob.com/oauth2/account/authorize"
 TOKEN_URL = "https://secure.myob.com/oauth2/v1/authorize"
 
+# Refresh the access token when it has less than this many seconds left
+REFRESH_MARGIN_SECONDS = 60
+
 
 class AuthError(Exception):
     pass
 
 
 class MyobAuth:
-    def __init__(self, config: MyobConfig) -> None:
+    def __init__(
+        self, config: MyobConfig, http_client: httpx.AsyncClient | None = None
+    ) -> None:
         self._config = config
-        self._tokens: dict[str, Any] | None = self._load_tokens()
+        self._http_client = http_client
+        self._tokens: dict[str, Any] | None = None
+        # Derived from _tokens by _apply_tokens: the ready-made Authorization
+        # value and the monotonic deadline after which it must be refreshed.
+        self._bearer: str | None = None
+        self._refresh_at: float = 0.0
+        # Serialises refreshes so a burst of callers triggers only one
+        self._refresh_lock = asyncio.Lock()
         self._oauth_state: str | None = None
+        # Everything in the authorize URL except the per-attempt CSRF state
+        self._static_auth_params: dict[str, str] = {
+            "client_id": config.client_id,
+            "redirect_uri": config.redirect_uri,
+            "response_type": "code",
+            "scope": " ".join(config.scopes),
+            # NOTE: do NOT send prompt=consent. For AccountRight (GUID-based)
+            # company files, MYOB rejects the authorize request with
+            # "something went wrong and we couldn't connect the app".
+            # prompt=consent / businessId is a MYOB Business (Essentials)
+            # concept; AccountRight uses the company file GUID, which we get
+            # from the /accountright/ registry or default_company_file_id.
+        }
+        tokens = self._load_tokens()
+        if tokens:
+            self._apply_tokens(tokens)
 
     @property
     def _token_file(self) -> Path:
@@ -38,37 +68,49 @@ class MyobAuth:
         if not path.exists():
             return None
         try:
-            with open(path) as f:
-                tokens = json.load(f)
+            tokens = orjson.loads(path.read_bytes())
             logger.info("Loaded OAuth tokens from %s", path)
             return tokens
-        except (json.JSONDecodeError, OSError) as e:
+        except (orjson.JSONDecodeError, OSError) as e:
             logger.warning("Failed to load tokens: %s", e)
             return None
 
+    def _apply_tokens(self, tokens: dict[str, Any]) -> None:
+        self._tokens = tokens
+        access_token = tokens.get("access_token")
+        self._bearer = f"Bearer {access_token}" if access_token else None
+        # Convert the wall-clock expiry to a monotonic deadline once so the
+        # per-request freshness check is immune to system clock jumps.
+        remaining = tokens.get("expires_at", 0) - time.time()
+        self._refresh_at = time.monotonic() + remaining - REFRESH_MARGIN_SECONDS
+
     def _save_tokens(self, tokens: dict[str, Any]) -> None:
         path = self._token_file
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(tokens, f, indent=2)
+        # Write to a temp file and rename over the original so a crash
+        # mid-write can never leave a truncated token file behind. The temp
+        # file is created 0600, so the tokens are never readable by others;
+        # a leftover from a crash is removed first, as O_CREAT would keep
+        # its old mode.
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.unlink(missing_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(tokens, option=orjson.OPT_INDENT_2))
+        os.replace(tmp, path)
         logger.info("Saved OAuth tokens to %s", path)
 
+    async def _post_token(self, payload: dict[str, str]) -> httpx.Response:
+        # Reuse the shared pooled client when available to skip a fresh
+        # TCP/TLS handshake on every token exchange or refresh.
+        if self._http_client is not None and not self._http_client.is_closed:
+            return await self._http_client.post(TOKEN_URL, data=payload, timeout=30.0)
+        async with httpx.AsyncClient() as client:
+            return await client.post(TOKEN_URL, data=payload, timeout=30.0)
+
     def get_authorization_url(self) -> str:
         self._oauth_state = secrets.token_urlsafe(32)
-        scopes = " ".join(self._config.scopes)
-        params = {
-            "client_id": self._config.client_id,
-            "redirect_uri": self._config.redirect_uri,
-            "response_type": "code",
-            "scope": scopes,
-            # NOTE: do NOT send prompt=consent. For AccountRight (GUID-based)
-            # company files, MYOB rejects the authorize request with
-            # "something went wrong and we couldn't connect the app".
-            # prompt=consent / businessId is a MYOB Business (Essentials)
-            # concept; AccountRight uses the company file GUID, which we get
-            # from the /accountright/ registry or default_company_file_id.
-            "state": self._oauth_state,
-        }
+        params = {**self._static_auth_params, "state": self._oauth_state}
         return f"{AUTH_URL}?{urlencode(params)}"
 
     async def exchange_code(
@@ -81,13 +123,12 @@ class MyobAuth:
             "grant_type": "authorization_code",
             "code": code,
         }
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(TOKEN_URL, data=payload, timeout=30.0)
+        resp = await self._post_token(payload)
 
         if resp.status_code != 200:
             raise AuthError(f"Token exchange failed ({resp.status_code}): {resp.text}")
 
-        data = resp.json()
+        data = orjson.loads(resp.content)
         tokens = {
             "access_token": data["access_token"],
             "refresh_token": data["refresh_token"],
@@ -98,12 +139,24 @@ class MyobAuth:
         if business_id:
             tokens["business_id"] = business_id
             logger.info("Captured company file ID (businessId): %s", business_id)
-        self._tokens = tokens
-        self._save_tokens(tokens)
+        # Under the refresh lock, so an in-flight refresh can't overwrite the
+        # new tokens with ones derived from the old refresh token
+        async with self._refresh_lock:
+            self._apply_tokens(tokens)
+            self._save_tokens(tokens)
         logger.info("OAuth authorization completed successfully")
         return tokens
 
     async def refresh_access_token(self) -> dict[str, Any]:
+        """Refresh the access token now, e.g. from the oauth_refresh tool.
+
+        Holds the refresh lock, so it never races an automatic refresh.
+        """
+        async with self._refresh_lock:
+            return await self._refresh()
+
+    async def _refresh(self) -> dict[str, Any]:
+        """Exchange the refresh token for new tokens; hold ``_refresh_lock``."""
         if not self._tokens or not self._tokens.get("refresh_token"):
             raise AuthError("No refresh token available. Run oauth_authorize first.")
 
@@ -113,13 +166,12 @@ class MyobAuth:
             "grant_type": "refresh_token",
             "refresh_token": self._tokens["refresh_token"],
         }
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(TOKEN_URL, data=payload, timeout=30.0)
+        resp = await self._post_token(payload)
 
         if resp.status_code != 200:
             raise AuthError(f"Token refresh failed ({resp.status_code}): {resp.text}")
 
-        data = resp.json()
+        data = orjson.loads(resp.content)
         tokens = {
             "access_token": data["access_token"],
             "refresh_token": data.get("refresh_token", self._tokens["refresh_token"]),
@@ -129,7 +181,7 @@ class MyobAuth:
         # Preserve businessId across refreshes
         if self._tokens.get("business_id"):
             tokens["business_id"] = self._tokens["business_id"]
-        self._tokens = tokens
+        self._apply_tokens(tokens)
         self._save_tokens(tokens)
         logger.info("OAuth token refreshed successfully")
         return tokens
@@ -138,12 +190,43 @@ class MyobAuth:
         if not self._tokens:
             raise AuthError("Not authenticated. Run oauth_authorize first.")
 
-        # Refresh if token expires within 60 seconds
-        if time.time() > self._tokens["expires_at"] - 60:
-            await self.refresh_access_token()
+        # Refresh if token expires within REFRESH_MARGIN_SECONDS. Re-check
+        # under the lock: another caller may have refreshed while we waited.
+        if time.monotonic() >= self._refresh_at:
+            async with self._refresh_lock:
+                if time.monotonic() >= self._refresh_at:
+                    await self._refresh()
 
         return self._tokens["access_token"]
 
+    async def refresh_rejected_token(self, rejected_bearer: str) -> None:
+        """Refresh after the API rejected ``rejected_bearer`` with a 401.
+
+        Concurrent callers that were all rejected with the same token share a
+        single refresh; later callers see the new token and return at once.
+        """
+        async with self._refresh_lock:
+            if self._bearer == rejected_bearer:
+                await self._refresh()
+
+    def get_bearer_sync(self) -> str | None:
+        """Return the cached Authorization value if the token is still fresh.
+
+        Returns None when the token is missing or due for refresh; callers
+        then fall back to the async ``get_bearer`` path.
+        """
+        if self._bearer is not None and time.monotonic() < self._refresh_at:
+            return self._bearer
+        return None
+
+    async def get_bearer(self) -> str:
+        """Return the Authorization header value, refreshing if needed."""
+        bearer = self.get_bearer_sync()
+        if bearer is not None:
+            return bearer
+        token = await self.get_valid_token()
+        return self._bearer or f"Bearer {token}"
+
     def get_token_status(self) -> dict[str, Any]:
         if not self._tokens:
             return {
@@ -163,87 +246,121 @@ class MyobAuth:
         return status
 
 
+_SUCCESS_HTML = (
+    b"<html><body>"
+    b"<h1>Authorization Successful</h1>"
+    b"<p>You can close this tab and "
+    b"return to Claude.</p>"
+    b"</body></html>"
+)
+_STATE_MISMATCH_HTML = (
+    b"<html><body><h1>Authorization Failed</h1>"
+    b"<p>Invalid state parameter. "
+    b"Please try authorizing again.</p></body></html>"
+)
+_NO_CODE_HTML = (
+    b"<html><body><h1>Invalid Request</h1>"
+    b"<p>No authorization code received.</p></body></html>"
+)
+_FAILED_HTML = "<html><body><h1>Authorization Failed</h1><p>{}</p></body></html>"
+
+
+def _failed_html(message: str) -> bytes:
+    # The message may echo query parameters, so escape it
+    return _FAILED_HTML.format(html.escape(message)).encode()
+
+
+def _http_response(body: bytes) -> bytes:
+    return (
+        f"HTTP/1.1 200 OK\r\n"
+        f"Content-Type: text/html\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    ).encode() + body
+
+
+_NO_CONTENT_RESPONSE = b"HTTP/1.1 204 No Content\r\nConnection: close\r\n\r\n"
+_MAX_REQUEST_HEAD = 8192
+
+
+async def _read_request_head(reader: asyncio.StreamReader) -> bytes:
+    """Read up to the end of the HTTP headers, however the browser splits
+    them across TCP segments."""
+    data = b""
+    while b"\r\n\r\n" not in data and len(data) < _MAX_REQUEST_HEAD:
+        chunk = await reader.read(_MAX_REQUEST_HEAD)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
 async def run_oauth_callback_server(auth: MyobAuth, port: int = 33333) -> None:
-    """Start a minimal HTTP server to capture the OAuth callback."""
+    """Start a minimal HTTP server to capture the OAuth callback.
+
+    Connections for other paths (favicon, preconnects) get an empty 204 and
+    do not end the wait; only a callback carrying a code or an error does.
+    """
     result: dict[str, Any] = {}
     event = asyncio.Event()
+    callback_path = urlparse(auth._config.redirect_uri).path or "/"
 
     async def handle_connection(
         reader: asyncio.StreamReader, writer: asyncio.StreamWriter
     ) -> None:
         try:
-            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
-            request_str = request_line.decode("utf-8", errors="replace")
+            try:
+                head = await asyncio.wait_for(_read_request_head(reader), timeout=10)
+            except asyncio.TimeoutError:
+                return
 
             # Parse GET /callback?code=...&... HTTP/1.1
-            parts = request_str.split(" ")
-            if len(parts) >= 2:
-                url = urlparse(parts[1])
-                params = parse_qs(url.query)
-
-                if "code" in params:
-                    # Validate CSRF state parameter
-                    callback_state = params.get("state", [None])[0]
-                    expected_state = auth._oauth_state
-                    auth._oauth_state = None  # Clear after use
-                    if not callback_state or callback_state != expected_state:
-                        logger.warning(
-                            "OAuth state mismatch: possible CSRF attempt"
-                        )
-                        body = (
-                            "<html><body><h1>Authorization Failed</h1>"
-                            "<p>Invalid state parameter. "
-                            "Please try authorizing again.</p></body></html>"
-                        )
-                        result["error"] = "OAuth state mismatch"
-                    else:
-                        code = params["code"][0]
-                        business_id = params.get("businessId", [None])[0]
-                        try:
-                            await auth.exchange_code(
-                                code, business_id=business_id
-                            )
-                            body = (
-                                "<html><body>"
-                                "<h1>Authorization Successful</h1>"
-                                "<p>You can close this tab and "
-                                "return to Claude.</p>"
-                                "</body></html>"
-                            )
-                            result["success"] = True
-                        except Exception as e:
-                            body = (
-                                f"<html><body>"
-                                f"<h1>Authorization Failed</h1>"
-                                f"<p>{e}</p></body></html>"
-                            )
-                            result["error"] = str(e)
-                elif "error" in params:
-                    error = params.get("error_description", params["error"])[0]
-                    body = (
-                        f"<html><body><h1>Authorization Failed</h1>"
-                        f"<p>{error}</p></body></html>"
-                    )
-                    result["error"] = error
-                else:
-                    body = (
-                        "<html><body><h1>Invalid Request</h1>"
-                        "<p>No authorization code received.</p></body></html>"
-                    )
-                    result["error"] = "No authorization code in callback"
-
-                response = (
-                    f"HTTP/1.1 200 OK\r\n"
-                    f"Content-Type: text/html\r\n"
-                    f"Content-Length: {len(body)}\r\n"
-                    f"Connection: close\r\n\r\n"
-                    f"{body}"
-                )
-                writer.write(response.encode())
+            request_line = head.split(b"\r\n", 1)[0]
+            parts = request_line.decode("utf-8", errors="replace").split(" ")
+            if len(parts) < 2:
+                return
+            url = urlparse(parts[1])
+            if url.path != callback_path:
+                writer.write(_NO_CONTENT_RESPONSE)
                 await writer.drain()
+                return
+            params = parse_qs(url.query)
+
+            done = True
+            if "code" in params:
+                # Validate CSRF state parameter
+                callback_state = params.get("state", [None])[0]
+                expected_state = auth._oauth_state
+                auth._oauth_state = None  # Clear after use
+                if not callback_state or callback_state != expected_state:
+                    logger.warning("OAuth state mismatch: possible CSRF attempt")
+                    body = _STATE_MISMATCH_HTML
+                    result["error"] = "OAuth state mismatch"
+                else:
+                    code = params["code"][0]
+                    business_id = params.get("businessId", [None])[0]
+                    try:
+                        await auth.exchange_code(code, business_id=business_id)
+                        body = _SUCCESS_HTML
+                        result["success"] = True
+                    except Exception as e:
+                        body = _failed_html(str(e))
+                        result["error"] = str(e)
+            elif "error" in params:
+                error = params.get("error_description", params["error"])[0]
+                body = _failed_html(error)
+                result["error"] = error
+            else:
+                # Keep waiting for the real redirect
+                body = _NO_CODE_HTML
+                done = False
+
+            writer.write(_http_response(body))
+            await writer.drain()
+            if done:
+                event.set()
         finally:
             writer.close()
-            event.set()
 
     server = await asyncio.start_server(handle_connection, "127.0.0.1", port)
     logger.info("OAuth callback server listening on port %d", port)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import heapq
 import time
+from collections import OrderedDict
 from typing import Any
 
 CACHE_TTL_ACCOUNTS = 1800  # 30 minutes
@@ -9,34 +11,167 @@ CACHE_TTL_CONTACTS = 900  # 15 minutes
 CACHE_TTL_EMPLOYEES = 900  # 15 minutes (contact subtype)
 CACHE_TTL_JOBS = 1800  # 30 minutes
 CACHE_TTL_COMPANY_FILES = 3600  # 1 hour
+# Transactional lists change often; a short TTL only collapses repeat reads.
+CACHE_TTL_INVOICES = 60  # 1 minute
+CACHE_TTL_SALES_ORDERS = 60  # 1 minute
+# A document's layout never changes after creation
+CACHE_TTL_LAYOUT = 3600  # 1 hour
+# ETag-validated bodies are revalidated on every use, so they can live long
+CACHE_TTL_ETAG = 3600  # 1 hour
+
+# Reference data (accounts, tax codes, company files) may be served this long
+# past its TTL while a background refresh runs (stale-while-revalidate).
+CACHE_STALE_TTL_REFERENCE = 1800  # 30 minutes
+
+
+def _group_of(key: str) -> str:
+    """Return the resource group of a key: everything up to and including the
+    first ':' (e.g. "contacts:" for "contacts:Customer:..."), or the whole key."""
+    group, sep, _ = key.partition(":")
+    return group + sep
+
+
+def make_key(group: str, *parts: Any) -> str:
+    """Build a cache key in ``group`` from the request parameters.
+
+    The parts are encoded with ``repr`` so ``None`` and ``"None"`` (or values
+    containing ':') can never produce the same key.
+    """
+    return f"{group}:{parts!r}"
+
+
+def make_key_prefix(group: str, *parts: Any) -> str:
+    """Prefix shared by every ``make_key(group, *parts, ...)`` key.
+
+    Lets a write drop only the cached lists whose leading parameters it can
+    affect, e.g. ``invalidate(make_key_prefix("contacts", "/Contact/Customer"))``.
+    """
+    return f"{group}:(" + "".join(f"{part!r}, " for part in parts)
 
 
 class TTLCache:
-    """Simple in-memory cache with per-key TTL."""
+    """Simple in-memory cache with per-key TTL.
+
+    Entries are bucketed by resource group so ``invalidate("contacts:")``
+    drops a whole group in O(1), and a min-heap of expiry times lets expired
+    entries be evicted even if they are never read again.
+
+    An entry set with ``stale_ttl`` outlives its TTL by that long: ``get``
+    ignores it once the TTL passes, but ``get_swr`` still returns it, flagged
+    as stale, so callers can serve it while refreshing in the background.
 
-    def __init__(self, default_ttl: float = 300) -> None:
+    At most ``max_size`` entries are kept; beyond that the least recently
+    used entry is dropped, bounding memory between expiries. The expiry heap
+    is rebuilt from the live entries whenever it grows past twice that.
+    """
+
+    def __init__(self, default_ttl: float = 300, max_size: int = 4096) -> None:
         self._default_ttl = default_ttl
-        self._store: dict[str, tuple[float, Any]] = {}
+        self._max_size = max_size
+        # key -> (fresh_until, stale_until, value), grouped by _group_of(key)
+        self._store: dict[str, dict[str, tuple[float, float, Any]]] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
+        # All live keys, least recently used first
+        self._lru: OrderedDict[str, None] = OrderedDict()
 
-    def get(self, key: str) -> Any | None:
-        entry = self._store.get(key)
-        if entry is None:
+    def _delete(self, key: str) -> None:
+        group = _group_of(key)
+        bucket = self._store.get(group)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._store[group]
+        self._lru.pop(key, None)
+
+    def _drop_group(self, group: str) -> None:
+        for k in self._store.pop(group):
+            self._lru.pop(k, None)
+
+    def _evict(self, now: float) -> None:
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, key = heapq.heappop(heap)
+            group = _group_of(key)
+            bucket = self._store.get(group)
+            if bucket is None:
+                continue
+            entry = bucket.get(key)
+            # Skip heap entries superseded by a later set() of the same key
+            if entry is not None and entry[1] <= now:
+                self._delete(key)
+
+    def _lookup(self, key: str, now: float) -> tuple[float, float, Any] | None:
+        self._evict(now)
+        bucket = self._store.get(_group_of(key))
+        if bucket is None:
             return None
-        expires_at, value = entry
-        if time.time() > expires_at:
-            del self._store[key]
+        entry = bucket.get(key)
+        if entry is not None:
+            self._lru.move_to_end(key)
+        return entry
+
+    def get(self, key: str) -> Any | None:
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is None or now >= entry[0]:
             return None
-        return value
+        return entry[2]
+
+    def get_swr(self, key: str) -> tuple[Any | None, bool]:
+        """Return ``(value, is_stale)``; ``(None, False)`` when absent."""
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is None:
+            return None, False
+        return entry[2], now >= entry[0]
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        now = time.monotonic()
+        self._evict(now)
+        fresh_until = now + (ttl if ttl is not None else self._default_ttl)
+        stale_until = fresh_until + (stale_ttl or 0)
+        self._store.setdefault(_group_of(key), {})[key] = (
+            fresh_until, stale_until, value,
+        )
+        heapq.heappush(self._expiry_heap, (stale_until, key))
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._max_size:
+            oldest, _ = self._lru.popitem(last=False)
+            self._delete(oldest)
+        if len(self._expiry_heap) > 2 * self._max_size:
+            self._rebuild_heap()
 
-    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
-        expires_at = time.time() + (ttl if ttl is not None else self._default_ttl)
-        self._store[key] = (expires_at, value)
+    def _rebuild_heap(self) -> None:
+        # Re-set, LRU-evicted and invalidated keys leave stale heap entries
+        # behind; rebuild from the live entries so the heap stays O(max_size)
+        self._expiry_heap = [
+            (entry[1], key)
+            for bucket in self._store.values()
+            for key, entry in bucket.items()
+        ]
+        heapq.heapify(self._expiry_heap)
 
     def invalidate(self, prefix: str = "") -> None:
         """Remove all entries whose key starts with prefix. Empty prefix clears all."""
         if not prefix:
             self._store.clear()
-        else:
-            keys = [k for k in self._store if k.startswith(prefix)]
-            for k in keys:
-                del self._store[k]
+            self._expiry_heap.clear()
+            self._lru.clear()
+            return
+        if prefix in self._store:
+            # Fast path: prefix is exactly a resource group such as "invoices:"
+            self._drop_group(prefix)
+            return
+        for group in list(self._store):
+            if group.startswith(prefix):
+                self._drop_group(group)
+            elif prefix.startswith(group):
+                for k in [k for k in self._store[group] if k.startswith(prefix)]:
+                    self._delete(k)
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import json
+import functools
 import logging
 import os
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+_ENV_VAR_RE = re.compile(r"\$\{(\w+)\}")
+
 
-@dataclass
+@dataclass(slots=True)
 class MyobConfig:
     client_id: str
     client_secret: str
@@ -29,6 +33,7 @@ class MyobConfig:
     ])
 
 
+@functools.cache
 def _get_config_home() -> Path:
     """Return the configuration directory, searching multiple locations.
 
@@ -57,10 +62,10 @@ def _get_config_home() -> Path:
 def _substitute_env_vars(obj: object) -> object:
     """Recursively replace ${ENV_VAR} patterns in strings with env var values."""
     if isinstance(obj, str):
-        return re.sub(
-            r"\$\{(\w+)\}",
-            lambda m: os.environ.get(m.group(1), m.group(0)),
-            obj,
+        if "${" not in obj:
+            return obj
+        return _ENV_VAR_RE.sub(
+            lambda m: os.environ.get(m.group(1), m.group(0)), obj
         )
     if isinstance(obj, dict):
         return {k: _substitute_env_vars(v) for k, v in obj.items()}
@@ -69,8 +74,14 @@ def _substitute_env_vars(obj: object) -> object:
     return obj
 
 
+@functools.cache
 def load_config() -> MyobConfig:
-    """Load configuration from JSON file or environment variables."""
+    """Load configuration from JSON file or environment variables.
+
+    The result is cached for the life of the process; call
+    ``load_config.cache_clear()`` and ``_get_config_home.cache_clear()``
+    to pick up changed files or environment variables.
+    """
     config_home = _get_config_home()
 
     config_path_str = os.environ.get("MYOB_MCP_CONFIG")
@@ -83,8 +94,7 @@ def load_config() -> MyobConfig:
 
     if config_path.exists():
         logger.info("Loading config from %s", config_path)
-        with open(config_path) as f:
-            raw = json.load(f)
+        raw = orjson.loads(config_path.read_bytes())
         data = _substitute_env_vars(raw)
     else:
         logger.info("No config file found, using environment variables")
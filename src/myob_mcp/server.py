@@ -1,13 +1,15 @@
 from __future__ import annotations
 
 import logging
+import os
 import sys
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 
+import anyio
 from mcp.server.fastmcp import FastMCP
 
-from .api_client import MyobApiClient
+from .api_client import MyobApiClient, create_http_client
 from .auth import MyobAuth
 from .cache import TTLCache
 from .config import MyobConfig, load_config
@@ -22,7 +24,7 @@ logging.basicConfig(
 logger = logging.getLogger("myob_mcp")
 
 
-@dataclass
+@dataclass(slots=True)
 class AppContext:
     config: MyobConfig
     auth: MyobAuth
@@ -33,9 +35,10 @@ class AppContext:
 async def app_lifespan(server: FastMCP):
     logger.info("Starting MYOB MCP server...")
     config = load_config()
-    auth = MyobAuth(config)
+    http_client = create_http_client()
+    auth = MyobAuth(config, http_client)
     cache = TTLCache()
-    client = MyobApiClient(config, auth, cache)
+    client = MyobApiClient(config, auth, cache, http_client)
     try:
         yield AppContext(config=config, auth=auth, client=client)
     finally:
@@ -53,11 +56,25 @@ mcp = FastMCP(
     lifespan=app_lifespan,
 )
 
-register_all_tools(mcp)
+# Comma-separated tool groups (module names in tools/) to leave unregistered
+_disabled_tools = {
+    name.strip()
+    for name in os.environ.get("MYOB_MCP_DISABLED_TOOLS", "").split(",")
+    if name.strip()
+}
+register_all_tools(mcp, disabled=_disabled_tools)
 
 
 def main():
-    mcp.run(transport="stdio")
+    # Use uvloop when installed (pip install .[uvloop]); otherwise this is
+    # exactly what mcp.run(transport="stdio") does.
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        use_uvloop = False
+    else:
+        use_uvloop = True
+    anyio.run(mcp.run_stdio_async, backend_options={"use_uvloop": use_uvloop})
 
 
 if __name__ == "__main__":
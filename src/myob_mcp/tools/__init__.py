@@ -1,27 +1,61 @@
 from __future__ import annotations
 
+import importlib
+import logging
+from collections.abc import Collection
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from mcp.server.fastmcp import FastMCP
 
+logger = logging.getLogger(__name__)
 
-def register_all_tools(mcp: FastMCP) -> None:
-    from . import (
-        accounts, attachments, banking, bills, company, contacts,
-        employees, invoices, jobs, oauth, payments, sales_orders, tax_codes,
-    )
-
-    oauth.register(mcp)
-    company.register(mcp)
-    accounts.register(mcp)
-    tax_codes.register(mcp)
-    contacts.register(mcp)
-    employees.register(mcp)
-    invoices.register(mcp)
-    payments.register(mcp)
-    bills.register(mcp)
-    banking.register(mcp)
-    attachments.register(mcp)
-    jobs.register(mcp)
-    sales_orders.register(mcp)
+# Tool modules in registration order. Each exposes register(mcp).
+TOOL_MODULES = (
+    "oauth",
+    "company",
+    "accounts",
+    "tax_codes",
+    "contacts",
+    "employees",
+    "invoices",
+    "payments",
+    "bills",
+    "banking",
+    "attachments",
+    "jobs",
+    "sales_orders",
+    "activity",
+)
+
+# Groups whose tools call another group's endpoints. They are skipped when
+# any group they depend on is disabled.
+_DEPENDS = {
+    "activity": frozenset(("invoices", "sales_orders")),
+}
+
+
+def register_all_tools(mcp: FastMCP, disabled: Collection[str] = ()) -> None:
+    """Import and register each tool module, skipping any named in disabled.
+
+    Disabled modules are never imported, so their import cost is not paid.
+    A module that depends on a disabled one (see ``_DEPENDS``) is skipped too.
+    """
+    unknown = set(disabled) - set(TOOL_MODULES)
+    if unknown:
+        raise ValueError(
+            f"Unknown tool group(s): {', '.join(sorted(unknown))}. "
+            f"Valid groups: {', '.join(TOOL_MODULES)}."
+        )
+    for name in TOOL_MODULES:
+        if name in disabled:
+            continue
+        missing = _DEPENDS.get(name, frozenset()) & set(disabled)
+        if missing:
+            logger.info(
+                "Skipping tool group %s: needs disabled %s",
+                name, ", ".join(sorted(missing)),
+            )
+            continue
+        module = importlib.import_module(f".{name}", __package__)
+        module.register(mcp)
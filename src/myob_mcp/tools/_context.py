@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from mcp.server.fastmcp import Context
+
+from ..api_client import MyobApiClient
+
+
+def api_client(ctx: Context) -> MyobApiClient:
+    """Return the shared API client from a tool call's lifespan context."""
+    return ctx.request_context.lifespan_context.client
@@ -1,57 +1,217 @@
 from __future__ import annotations
 
+import datetime
+import functools
 import re
-from typing import Any
-
-_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+import sys
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from types import MappingProxyType
+from typing import Any, Callable
 
 
+@functools.lru_cache(maxsize=512)
 def escape_odata(value: str) -> str:
     """Escape single quotes for OData string literals."""
     return value.replace("'", "''")
 
 
+@functools.lru_cache(maxsize=2048)
+def _is_valid_date(value: str) -> bool:
+    if (
+        len(value) != 10
+        or value[4] != "-"
+        or value[7] != "-"
+        or not value.isascii()
+    ):
+        return False
+    # The C date parser also rejects impossible dates such as 2024-02-30
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
 def validate_date(value: str, param_name: str) -> str:
     """Validate ISO 8601 date format (YYYY-MM-DD)."""
-    if not _DATE_RE.match(value):
+    if not _is_valid_date(value):
         raise ValueError(
             f"Invalid date format for {param_name}: '{value}'. Expected YYYY-MM-DD."
         )
     return value
 
 
+_DATE_GE = "Date ge datetime'{}'"
+_DATE_LE = "Date le datetime'{}'"
+
+
+def date_filters(date_from: str | None, date_to: str | None) -> list[str]:
+    """Validate an optional date range and build its OData filter clauses."""
+    parts: list[str] = []
+    if date_from:
+        parts.append(_DATE_GE.format(validate_date(date_from, "date_from")))
+    if date_to:
+        parts.append(_DATE_LE.format(validate_date(date_to, "date_to")))
+    return parts
+
+
+_STATUS_EQ = "Status eq '{}'"
+_CUSTOMER_EQ = "Customer/UID eq guid'{}'"
+_NUMBER_SEARCH = "substringof('{}', Number) eq true"
+
+
+def sale_list_params(
+    date_from: str | None,
+    date_to: str | None,
+    status: str | None,
+    customer_id: str | None,
+    search: str | None,
+    orderby: str | None,
+) -> dict[str, str]:
+    """Build the query params shared by the invoice and sales order lists."""
+    parts = date_filters(date_from, date_to)
+    if status:
+        parts.append(_STATUS_EQ.format(escape_odata(status)))
+    if customer_id:
+        parts.append(_CUSTOMER_EQ.format(customer_id))
+    if search:
+        parts.append(_NUMBER_SEARCH.format(escape_odata(search)))
+    params: dict[str, str] = {}
+    if parts:
+        params["$filter"] = parts[0] if len(parts) == 1 else " and ".join(parts)
+    if orderby:
+        params["$orderby"] = orderby
+    return params
+
+
+# Document layouts with their own endpoints (/Sale/Invoice/Item, ...)
+VALID_LAYOUTS = frozenset(("Item", "Service"))
+
+
+def coerce_layout(value: str, param_name: str) -> str:
+    """Normalise an 'Item'/'Service' layout argument, case-insensitively."""
+    if value in VALID_LAYOUTS:
+        return value
+    layout = value.capitalize()
+    if layout not in VALID_LAYOUTS:
+        raise ValueError(
+            f"Invalid {param_name} '{value}'. Must be 'Item' or 'Service'."
+        )
+    return layout
+
+
 # ---------------------------------------------------------------------------
 # Response filtering — whitelist-based field extraction
 # ---------------------------------------------------------------------------
 
-_STRIP_KEYS = {"URI", "RowVersion"}
+# Each spec is compiled once into a specialised Python function that
+# hard-codes its keys and nested pickers, so the per-record work is a
+# straight run of dict lookups with no spec walking.
+_MISSING = object()
+
+_Picker = Callable[[dict[str, Any]], dict[str, Any]]
+
+# id(spec) -> (spec, picker); the spec is held so its id can't be reused.
+# Pickers for the frozen *_FIELDS specs below (and the specs nested in them)
+# are generated at import time and kept for good.
+_pickers: dict[int, tuple[Mapping[str, Any], _Picker]] = {}
+# Pickers for any other spec, least recently used first. Bounded so specs
+# built on the fly can't accumulate for the life of the server.
+_ADHOC_PICKERS_MAX = 64
+_adhoc_pickers: OrderedDict[int, tuple[Mapping[str, Any], _Picker]] = OrderedDict()
+
 
+def _codegen_picker(
+    name: str, fields: Mapping[str, Any], permanent: bool = False
+) -> _Picker:
+    """Generate a picker function for ``fields``.
 
-def pick(obj: dict[str, Any], fields: dict[str, Any]) -> dict[str, Any]:
+    Nested specs get their own picker via ``_compile_spec``, so shared
+    references such as ``_CUSTOMER_REF`` are generated once and reused.
+    """
+    name = re.sub(r"\W", "_", name)
+    namespace: dict[str, Any] = {"_M": _MISSING, "_dict": dict, "_list": list}
+    lines = [f"def _pick_{name}(o):", "    r = {}", "    g = o.get"]
+    for i, (key, spec) in enumerate(fields.items()):
+        k = repr(key)
+        if spec is True:
+            lines += [
+                f"    v = g({k}, _M)",
+                f"    if v is not _M: r[{k}] = v",
+            ]
+        elif isinstance(spec, Mapping):
+            sub = f"_s{i}"
+            namespace[sub] = _compile_spec(spec, f"{name}_{key}", permanent)
+            lines += [
+                f"    v = g({k}, _M)",
+                "    if v is not _M:",
+                "        t = type(v)",
+                f"        if t is _dict: r[{k}] = {sub}(v)",
+                f"        elif t is _list: r[{k}] = [{sub}(x) for x in v if type(x) is _dict]",
+            ]
+    lines.append("    return r")
+
+    if all(spec is True for spec in fields.values()):
+        # Flat specs (refs, most list specs) usually find every key, so try
+        # a single dict display first and only fall back when one is missing.
+        lines[0] = f"def _pick_{name}_partial(o):"
+        display = ", ".join(f"{key!r}: o[{key!r}]" for key in fields)
+        lines += [
+            f"def _pick_{name}(o):",
+            "    try:",
+            f"        return {{{display}}}",
+            "    except KeyError:",
+            f"        return _pick_{name}_partial(o)",
+        ]
+
+    exec(compile("\n".join(lines), f"<pick {name}>", "exec"), namespace)
+    return namespace[f"_pick_{name}"]
+
+
+def _compile_spec(
+    fields: Mapping[str, Any], name: str = "spec", permanent: bool = False
+) -> _Picker:
+    """Return the cached picker for a field spec, generating it on first use.
+
+    ``permanent`` pickers are never evicted; any other spec's picker lives in
+    a small LRU cache.
+    """
+    entry = _pickers.get(id(fields))
+    if entry is not None and entry[0] is fields:
+        return entry[1]
+    entry = _adhoc_pickers.get(id(fields))
+    if entry is not None and entry[0] is fields:
+        _adhoc_pickers.move_to_end(id(fields))
+        return entry[1]
+    picker = _codegen_picker(name, fields, permanent)
+    if permanent:
+        _pickers[id(fields)] = (fields, picker)
+    else:
+        _adhoc_pickers[id(fields)] = (fields, picker)
+        if len(_adhoc_pickers) > _ADHOC_PICKERS_MAX:
+            _adhoc_pickers.popitem(last=False)
+    return picker
+
+
+def pick(obj: dict[str, Any], fields: Mapping[str, Any]) -> dict[str, Any]:
     """Keep only whitelisted fields from a dict, recursively.
 
     ``fields`` maps key names to either:
     - ``True``   — keep the value as-is
-    - a ``dict`` — recurse into the nested object (or each item if it's a list)
+    - a mapping — recurse into the nested object (or each item if it's a list)
+
+    Output keys follow the spec's order, so equally shaped results serialise
+    identically.
     """
-    out: dict[str, Any] = {}
-    for key, spec in fields.items():
-        if key not in obj:
-            continue
-        val = obj[key]
-        if spec is True:
-            out[key] = val
-        elif isinstance(spec, dict):
-            if isinstance(val, dict):
-                out[key] = pick(val, spec)
-            elif isinstance(val, list):
-                out[key] = [pick(item, spec) for item in val if isinstance(item, dict)]
-    return out
+    return _compile_spec(fields)(obj)
 
 
-def pick_list(items: list[dict[str, Any]], fields: dict[str, Any]) -> list[dict[str, Any]]:
-    """Apply ``pick`` to every item in a list."""
-    return [pick(item, fields) for item in items]
+def pick_list(
+    items: Iterable[dict[str, Any]], fields: Mapping[str, Any]
+) -> list[dict[str, Any]]:
+    """Apply ``pick`` to every item, consuming ``items`` in a single pass."""
+    return list(map(_compile_spec(fields), items))
 
 
 def fix_subtotal(item: dict[str, Any]) -> dict[str, Any]:
@@ -60,6 +220,9 @@ def fix_subtotal(item: dict[str, Any]) -> dict[str, Any]:
     When IsTaxInclusive is True, MYOB sets Subtotal equal to TotalAmount
     (the tax-inclusive total). This corrects it to TotalAmount - TotalTax
     so callers always receive the pre-tax subtotal regardless of tax mode.
+
+    Returns a corrected copy; ``item`` itself is never modified, since API
+    results may be shared with the cache and other callers.
     """
     if item.get("IsTaxInclusive"):
         total = item.get("TotalAmount") or 0
@@ -68,11 +231,37 @@ def fix_subtotal(item: dict[str, Any]) -> dict[str, Any]:
     return item
 
 
+def project_invoice_list(items: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Project raw invoice list items, correcting each Subtotal."""
+    return pick_list(map(fix_subtotal, items), INVOICE_LIST_FIELDS)
+
+
+def project_sales_order_list(
+    items: Iterable[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Project raw sales order list items, correcting each Subtotal."""
+    return pick_list(map(fix_subtotal, items), SALES_ORDER_LIST_FIELDS)
+
+
+_STRIP_KEYS = frozenset(("URI", "RowVersion"))
+
+
 def strip_metadata(obj: dict[str, Any]) -> dict[str, Any]:
-    """Remove URI and RowVersion from top-level keys."""
+    """Return a copy of ``obj`` without the top-level URI and RowVersion.
+
+    Only for responses without a whitelist spec: ``pick`` already drops
+    these keys because no spec lists them.
+    """
     return {k: v for k, v in obj.items() if k not in _STRIP_KEYS}
 
 
+_LINE_REQUIRED = {
+    "Item": ("account_id", "ship_quantity", "unit_price", "total"),
+    "Service": ("account_id", "amount"),
+}
+_LINE_REQUIRED_SETS = {k: frozenset(v) for k, v in _LINE_REQUIRED.items()}
+
+
 def build_lines(
     line_items: list[dict[str, Any]], layout: str
 ) -> list[dict[str, Any]]:
@@ -82,40 +271,91 @@ def build_lines(
     Service layout lines require: description, amount, account_id
     Both accept optional: tax_code_id, job_id
     """
-    lines: list[dict[str, Any]] = []
+    is_item = layout == "Item"
+    kind = "Item" if is_item else "Service"
+    required = _LINE_REQUIRED[kind]
+    required_set = _LINE_REQUIRED_SETS[kind]
+    lines: list[Any] = [None] * len(line_items)
     for i, item in enumerate(line_items):
-        line: dict[str, Any] = {
-            "Type": "Transaction",
-            "Description": item.get("description", ""),
-            "Account": {"UID": item["account_id"]},
-        }
-
-        if layout == "Item":
-            for field in ("ship_quantity", "unit_price", "total"):
-                if field not in item:
-                    raise ValueError(
-                        f"Line item {i}: '{field}' is required for Item layout."
-                    )
-            line["ShipQuantity"] = item["ship_quantity"]
-            line["UnitPrice"] = item["unit_price"]
-            line["Total"] = item["total"]
+        # Validate before building anything for this line, reporting every
+        # missing field at once
+        if not required_set <= item.keys():
+            missing = [f"'{f}'" for f in required if f not in item]
+            verb = "is" if len(missing) == 1 else "are"
+            raise ValueError(
+                f"Line item {i}: {', '.join(missing)} {verb} required "
+                f"for {kind} layout."
+            )
+
+        if is_item:
+            line: dict[str, Any] = {
+                "Type": "Transaction",
+                "Description": item.get("description", ""),
+                "Account": {"UID": item["account_id"]},
+                "ShipQuantity": item["ship_quantity"],
+                "UnitPrice": item["unit_price"],
+                "Total": item["total"],
+            }
         else:  # Service
-            if "amount" not in item:
-                raise ValueError(
-                    f"Line item {i}: 'amount' is required for Service layout."
-                )
-            line["Total"] = item["amount"]
+            line = {
+                "Type": "Transaction",
+                "Description": item.get("description", ""),
+                "Account": {"UID": item["account_id"]},
+                "Total": item["amount"],
+            }
 
         if "tax_code_id" in item:
             line["TaxCode"] = {"UID": item["tax_code_id"]}
         if "job_id" in item:
             line["Job"] = {"UID": item["job_id"]}
 
-        lines.append(line)
+        lines[i] = line
 
     return lines
 
 
+# Line schemas for map_lines: (input key, MYOB key, wrap as {"UID": ...}).
+# Only keys present on the input item are emitted.
+BILL_LINE_SCHEMA: tuple[tuple[str, str, bool], ...] = (
+    ("description", "Description", False),
+    ("quantity", "Quantity", False),
+    ("unit_price", "UnitPrice", False),
+    ("account_id", "Account", True),
+    ("tax_code_id", "TaxCode", True),
+)
+BILL_LINE_REQUIRED = ("description", "quantity", "unit_price", "account_id")
+
+BANKING_LINE_SCHEMA: tuple[tuple[str, str, bool], ...] = (
+    ("account_id", "Account", True),
+    ("amount", "Amount", False),
+    ("description", "Memo", False),
+    ("tax_code_id", "TaxCode", True),
+    ("job_id", "Job", True),
+)
+BANKING_LINE_REQUIRED = ("account_id", "amount", "tax_code_id")
+
+
+def map_lines(
+    line_items: list[dict[str, Any]],
+    schema: tuple[tuple[str, str, bool], ...],
+    required: tuple[str, ...],
+) -> list[dict[str, Any]]:
+    """Build MYOB line objects by renaming keys according to ``schema``."""
+    required_set = frozenset(required)
+    lines: list[dict[str, Any]] = []
+    append = lines.append
+    for i, item in enumerate(line_items):
+        if not required_set <= item.keys():
+            missing = next(k for k in required if k not in item)
+            raise ValueError(f"Line item {i}: '{missing}' is required.")
+        append({
+            out: {"UID": item[key]} if ref else item[key]
+            for key, out, ref in schema
+            if key in item
+        })
+    return lines
+
+
 # ---------------------------------------------------------------------------
 # Field specs — whitelists per entity type and operation
 # ---------------------------------------------------------------------------
@@ -514,3 +754,29 @@ ATTACHMENT_UPLOAD_RESULT_FIELDS: dict[str, Any] = {
     "UID": True,
     "OriginalFileName": True,
 }
+
+
+# Freeze the specs above so nothing downstream can mutate a shared whitelist.
+# Shared references (_CUSTOMER_REF, ...) map to one proxy, keeping their
+# generated pickers shared too.
+def _freeze(
+    spec: dict[str, Any], memo: dict[int, MappingProxyType[str, Any]]
+) -> MappingProxyType[str, Any]:
+    frozen = memo.get(id(spec))
+    if frozen is None:
+        frozen = MappingProxyType({
+            sys.intern(key): _freeze(val, memo) if isinstance(val, dict) else val
+            for key, val in spec.items()
+        })
+        memo[id(spec)] = frozen
+    return frozen
+
+
+# Generate the pickers at import time as well, so they carry readable names
+# in tracebacks and the first tool call doesn't pay for it.
+_memo: dict[int, MappingProxyType[str, Any]] = {}
+for _name, _spec in list(globals().items()):
+    if _name.endswith("_FIELDS"):
+        globals()[_name] = _freeze(_spec, _memo)
+        _compile_spec(globals()[_name], _name.removesuffix("_FIELDS"), permanent=True)
+del _name, _spec, _memo
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from ..api_client import MyobApiClient, PageTransform
+from ..cache import (
+    CACHE_TTL_INVOICES,
+    CACHE_TTL_LAYOUT,
+    CACHE_TTL_SALES_ORDERS,
+    TTLCache,
+    make_key,
+)
+from ._filters import (
+    VALID_LAYOUTS,
+    project_invoice_list,
+    project_sales_order_list,
+    sale_list_params,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SaleDocument:
+    """Where a kind of sale document is listed and how it is cached."""
+
+    path: str
+    # Cache group for its lists, and for the layouts remembered from them
+    group: str
+    layout_group: str
+    # The list item field naming the document's layout
+    layout_field: str
+    cache_ttl: float
+    project: Callable[[list[dict[str, Any]]], list[dict[str, Any]]]
+
+
+INVOICE = SaleDocument(
+    "/Sale/Invoice", "invoices", "invoice_layout", "InvoiceType",
+    CACHE_TTL_INVOICES, project_invoice_list,
+)
+SALES_ORDER = SaleDocument(
+    "/Sale/Order", "sales_orders", "sales_order_layout", "OrderType",
+    CACHE_TTL_SALES_ORDERS, project_sales_order_list,
+)
+
+
+def remember_layouts(
+    doc: SaleDocument, cache: TTLCache, items: list[dict[str, Any]]
+) -> None:
+    """Record each listed document's layout so a later get can skip the
+    layout-discovery request."""
+    for item in items:
+        layout = item.get(doc.layout_field)
+        if layout in VALID_LAYOUTS and item.get("UID"):
+            cache.set(make_key(doc.layout_group, item["UID"]), layout, CACHE_TTL_LAYOUT)
+
+
+@functools.lru_cache(maxsize=8)
+def _list_transform(doc: SaleDocument, cache: TTLCache) -> PageTransform:
+    # One function per (document, cache), so identical concurrent list calls
+    # pass the same transform and request_paged can share their fetch
+    def project(page: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        remember_layouts(doc, cache, page)
+        return doc.project(page)
+
+    return project
+
+
+async def fetch_sale_list(
+    doc: SaleDocument,
+    client: MyobApiClient,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    status: str | None = None,
+    customer_id: str | None = None,
+    search: str | None = None,
+    top: int | None = None,
+    orderby: str | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch, project and cache a list of ``doc``, recording layouts.
+
+    Used by the list tools and list_recent_activity alike, so they share
+    cache entries.
+    """
+    params = sale_list_params(
+        date_from, date_to, status, customer_id, search, orderby
+    )
+    cache_key = make_key(
+        doc.group, date_from, date_to, status, customer_id, search, top, orderby
+    )
+    return await client.request_paged(
+        doc.path,
+        params=params,
+        top=top,
+        cache_key=cache_key,
+        cache_ttl=doc.cache_ttl,
+        transform=_list_transform(doc, client.cache),
+    )
@@ -4,9 +4,19 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
-from ..cache import CACHE_TTL_ACCOUNTS
+from ..cache import CACHE_STALE_TTL_REFERENCE, CACHE_TTL_ACCOUNTS, make_key
+from ._context import api_client
 from ._filters import escape_odata, pick_list, strip_metadata, ACCOUNT_LIST_FIELDS
 
+_SEARCH_FILTER = (
+    "(substringof('{s}', tolower(DisplayID)) eq true"
+    " or substringof('{s}', tolower(Name)) eq true)"
+)
+
+
+def _project_accounts(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return pick_list(items, ACCOUNT_LIST_FIELDS)
+
 
 def register(mcp: FastMCP) -> None:
 
@@ -27,7 +37,7 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         params: dict[str, str] = {}
         filters: list[str] = []
         if filter:
@@ -35,25 +45,24 @@ def register(mcp: FastMCP) -> None:
         if is_active is not None:
             filters.append(f"IsActive eq {'true' if is_active else 'false'}")
         if search:
-            safe = escape_odata(search).lower()
-            filters.append(
-                f"(substringof('{safe}', tolower(DisplayID)) eq true"
-                f" or substringof('{safe}', tolower(Name)) eq true)"
-            )
-        if filters:
+            filters.append(_SEARCH_FILTER.format(s=escape_odata(search).lower()))
+        if len(filters) == 1:
+            params["$filter"] = filters[0]
+        elif filters:
             params["$filter"] = " and ".join(filters)
         if orderby:
             params["$orderby"] = orderby
 
-        cache_key = f"accounts:{filter}:{is_active}:{search}:{top}:{orderby}"
-        items = await app.client.request_paged(
+        cache_key = make_key("accounts", filter, is_active, search, top, orderby)
+        return await client.request_paged(
             "/GeneralLedger/Account",
             params=params,
             top=top,
             cache_key=cache_key,
             cache_ttl=CACHE_TTL_ACCOUNTS,
+            stale_ttl=CACHE_STALE_TTL_REFERENCE,
+            transform=_project_accounts,
         )
-        return pick_list(items, ACCOUNT_LIST_FIELDS)
 
     @mcp.tool(
         description="Get detailed information about a specific account by its UID"
@@ -62,8 +71,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         account_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET", f"/GeneralLedger/Account/{account_id}"
         )
         return strip_metadata(result)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from mcp.server.fastmcp import Context, FastMCP
+
+from ._context import api_client
+from ._sales import INVOICE, SALES_ORDER, fetch_sale_list
+
+
+def register(mcp: FastMCP) -> None:
+
+    @mcp.tool(
+        description="Get sales invoices and sales orders for a date range in one call. "
+        "Both lists are fetched concurrently and return the same fields as "
+        "list_invoices and list_sales_orders. Use top to limit each list."
+    )
+    async def list_recent_activity(
+        ctx: Context,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        top: int | None = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        client = api_client(ctx)
+        invoices, orders = await asyncio.gather(
+            fetch_sale_list(INVOICE, client, date_from, date_to, top=top),
+            fetch_sale_list(SALES_ORDER, client, date_from, date_to, top=top),
+        )
+        return {"invoices": invoices, "sales_orders": orders}
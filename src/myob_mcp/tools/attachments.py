@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import base64
+import binascii
 from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from ._context import api_client
 from ._filters import (
+    coerce_layout,
     pick_list,
     ATTACHMENT_LIST_FIELDS,
     ATTACHMENT_UPLOAD_RESULT_FIELDS,
@@ -12,26 +16,58 @@ from ._filters import (
 
 ALLOWED_EXTENSIONS = {"pdf", "tiff", "tif", "jpg", "jpeg", "png"}
 MAX_FILE_SIZE_BYTES = 3 * 1024 * 1024  # 3 MB
-_VALID_BILL_LAYOUTS = {"Item", "Service"}
+# Longest padded base64 encoding of a MAX_FILE_SIZE_BYTES file.
+_MAX_BASE64_LEN = (MAX_FILE_SIZE_BYTES + 2) // 3 * 4
+_ALLOWED_SUFFIXES = tuple(sorted("." + e for e in ALLOWED_EXTENSIONS))
+_ALLOWED_EXT_MSG = ", ".join(sorted(ALLOWED_EXTENSIONS))
+# (leading bytes, format name, extensions) for each accepted file type
+_MAGIC = (
+    (b"%PDF", "PDF", ("pdf",)),
+    (b"\x89PNG\r\n\x1a\n", "PNG", ("png",)),
+    (b"\xff\xd8\xff", "JPEG", ("jpg", "jpeg")),
+    (b"II*\x00", "TIFF", ("tiff", "tif")),
+    (b"MM\x00*", "TIFF", ("tiff", "tif")),
+)
 
 
 def _validate_attachment(file_name: str, file_base64_content: str) -> None:
     if not file_name or not file_name.strip():
         raise ValueError("file_name must not be empty.")
-    ext = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
-    if ext not in ALLOWED_EXTENSIONS:
+    if not file_name.lower().endswith(_ALLOWED_SUFFIXES):
+        ext = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
         raise ValueError(
             f"Unsupported file extension '.{ext}'. "
-            f"Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}."
+            f"Allowed: {_ALLOWED_EXT_MSG}."
         )
     if not file_base64_content or not file_base64_content.strip():
         raise ValueError("file_base64_content must not be empty.")
-    approx_bytes = len(file_base64_content) * 3 / 4
-    if approx_bytes > MAX_FILE_SIZE_BYTES:
+    n = len(file_base64_content)
+    if n > _MAX_BASE64_LEN:
         raise ValueError(
-            f"File too large (~{approx_bytes / (1024 * 1024):.1f} MB). "
+            f"File too large (~{n * 3 / 4 / (1024 * 1024):.1f} MB). "
             f"Maximum is 3 MB."
         )
+    if file_base64_content.lstrip()[:5].lower() == "data:":
+        raise ValueError(
+            "file_base64_content must be plain base64, without a "
+            "'data:...;base64,' prefix."
+        )
+    # 24 characters decode to 18 bytes, enough for every signature. Line
+    # breaks and other whitespace are dropped first, as the decoder would,
+    # and the head is cut to whole 4-character groups so padding is valid.
+    head_chars = "".join(file_base64_content[:32].split())[:24]
+    try:
+        head = base64.b64decode(head_chars[: len(head_chars) // 4 * 4])
+    except binascii.Error:
+        raise ValueError("file_base64_content is not valid base64.") from None
+    ext = file_name.rsplit(".", 1)[-1].lower()
+    for magic, kind, exts in _MAGIC:
+        if head.startswith(magic):
+            if ext not in exts:
+                raise ValueError(
+                    f"File '{file_name}' claims .{ext} but its content is {kind}."
+                )
+            break
 
 
 def _attachment_body(file_name: str, file_base64_content: str) -> dict[str, Any]:
@@ -70,8 +106,8 @@ def register(mcp: FastMCP) -> None:
         file_base64_content: str,
     ) -> list[dict[str, Any]]:
         _validate_attachment(file_name, file_base64_content)
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "POST",
             f"/Banking/SpendMoneyTxn/{transaction_id}/Attachment",
             json_body=_attachment_body(file_name, file_base64_content),
@@ -87,8 +123,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         transaction_id: str,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET",
             f"/Banking/SpendMoneyTxn/{transaction_id}/Attachment",
         )
@@ -103,8 +139,8 @@ def register(mcp: FastMCP) -> None:
         transaction_id: str,
         attachment_id: str,
     ) -> dict[str, str]:
-        app = ctx.request_context.lifespan_context
-        await app.client.request(
+        client = api_client(ctx)
+        await client.request(
             "DELETE",
             f"/Banking/SpendMoneyTxn/{transaction_id}/Attachment/{attachment_id}",
         )
@@ -125,15 +161,10 @@ def register(mcp: FastMCP) -> None:
         file_base64_content: str,
         bill_layout: str = "Item",
     ) -> list[dict[str, Any]]:
-        layout = bill_layout.capitalize()
-        if layout not in _VALID_BILL_LAYOUTS:
-            raise ValueError(
-                f"Invalid bill_layout '{bill_layout}'. "
-                f"Must be 'Item' or 'Service'."
-            )
+        layout = coerce_layout(bill_layout, "bill_layout")
         _validate_attachment(file_name, file_base64_content)
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "POST",
             f"/Purchase/Bill/{layout}/{bill_id}/Attachment",
             json_body=_attachment_body(file_name, file_base64_content),
@@ -150,14 +181,9 @@ def register(mcp: FastMCP) -> None:
         bill_id: str,
         bill_layout: str = "Item",
     ) -> list[dict[str, Any]]:
-        layout = bill_layout.capitalize()
-        if layout not in _VALID_BILL_LAYOUTS:
-            raise ValueError(
-                f"Invalid bill_layout '{bill_layout}'. "
-                f"Must be 'Item' or 'Service'."
-            )
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        layout = coerce_layout(bill_layout, "bill_layout")
+        client = api_client(ctx)
+        result = await client.request(
             "GET",
             f"/Purchase/Bill/{layout}/{bill_id}/Attachment",
         )
@@ -175,14 +201,9 @@ def register(mcp: FastMCP) -> None:
         attachment_id: str,
         bill_layout: str = "Item",
     ) -> dict[str, str]:
-        layout = bill_layout.capitalize()
-        if layout not in _VALID_BILL_LAYOUTS:
-            raise ValueError(
-                f"Invalid bill_layout '{bill_layout}'. "
-                f"Must be 'Item' or 'Service'."
-            )
-        app = ctx.request_context.lifespan_context
-        await app.client.request(
+        layout = coerce_layout(bill_layout, "bill_layout")
+        client = api_client(ctx)
+        await client.request(
             "DELETE",
             f"/Purchase/Bill/{layout}/{bill_id}/Attachment/{attachment_id}",
         )
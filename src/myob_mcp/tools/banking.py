@@ -5,38 +5,32 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from ._context import api_client
 from ._filters import (
-    validate_date,
+    date_filters,
     pick,
     pick_list,
+    map_lines,
     BANK_ACCOUNT_LIST_FIELDS,
     SPEND_MONEY_DETAIL_FIELDS,
     SPEND_MONEY_CREATE_RESULT_FIELDS,
     RECEIVE_MONEY_LIST_FIELDS,
     RECEIVE_MONEY_DETAIL_FIELDS,
     RECEIVE_MONEY_CREATE_RESULT_FIELDS,
+    BANKING_LINE_SCHEMA,
+    BANKING_LINE_REQUIRED,
 )
 
+_ACCOUNT_FILTER = "Account/UID eq guid'{}'"
+_VALID_DEPOSIT_TO = frozenset(("Account", "UndepositedFunds"))
+_VALID_PAY_FROM = frozenset(("Account", "ElectronicPayments"))
+
 
 # ---------------------------------------------------------------------------
 # Helpers for the unified list_bank_transactions tool
 # ---------------------------------------------------------------------------
 
 
-def _build_date_filters(
-    date_from: str | None, date_to: str | None
-) -> list[str]:
-    """Build OData date range filter clauses."""
-    parts: list[str] = []
-    if date_from:
-        validate_date(date_from, "date_from")
-        parts.append(f"Date ge datetime'{date_from}'")
-    if date_to:
-        validate_date(date_to, "date_to")
-        parts.append(f"Date le datetime'{date_to}'")
-    return parts
-
-
 def _contact_ref(obj: dict[str, Any] | None) -> dict[str, Any] | None:
     """Extract {UID, Name} from a contact-like object, or return None."""
     if obj and "UID" in obj:
@@ -103,11 +97,11 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         params: dict[str, str] = {}
         if orderby:
             params["$orderby"] = orderby
-        items = await app.client.request_paged(
+        items = await client.request_paged(
             "/Banking/BankAccount", params=params or None, top=top
         )
         return pick_list(items, BANK_ACCOUNT_LIST_FIELDS)
@@ -126,34 +120,30 @@ def register(mcp: FastMCP) -> None:
         date_to: str | None = None,
         top: int | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
-        date_filters = _build_date_filters(date_from, date_to)
-        acct_filter = f"Account/UID eq guid'{bank_account_id}'"
+        client = api_client(ctx)
+        dates = date_filters(date_from, date_to)
+        acct_filter = _ACCOUNT_FILTER.format(bank_account_id)
 
-        spend_filter = " and ".join([acct_filter] + date_filters)
-        receive_filter = " and ".join(
-            ["DepositTo eq 'Account'", acct_filter] + date_filters
-        )
-        cust_pay_filter = " and ".join([acct_filter] + date_filters)
-        supp_pay_filter = " and ".join(
-            ["PayFrom eq 'Account'", acct_filter] + date_filters
-        )
+        spend_filter = " and ".join([acct_filter, *dates])
+        receive_filter = " and ".join(["DepositTo eq 'Account'", acct_filter, *dates])
+        cust_pay_filter = spend_filter
+        supp_pay_filter = " and ".join(["PayFrom eq 'Account'", acct_filter, *dates])
 
         spend_items, receive_items, cust_items, supp_items = (
             await asyncio.gather(
-                app.client.request_paged(
+                client.request_paged(
                     "/Banking/SpendMoneyTxn",
                     params={"$filter": spend_filter},
                 ),
-                app.client.request_paged(
+                client.request_paged(
                     "/Banking/ReceiveMoneyTxn",
                     params={"$filter": receive_filter},
                 ),
-                app.client.request_paged(
+                client.request_paged(
                     "/Sale/CustomerPayment",
                     params={"$filter": cust_pay_filter},
                 ),
-                app.client.request_paged(
+                client.request_paged(
                     "/Purchase/SupplierPayment",
                     params={"$filter": supp_pay_filter},
                 ),
@@ -187,22 +177,18 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         params: dict[str, str] = {}
-        filters: list[str] = []
-        filters.append("DepositTo eq 'Account'")
-        filters.append(f"Account/UID eq guid'{bank_account_id}'")
-        if date_from:
-            validate_date(date_from, "date_from")
-            filters.append(f"Date ge datetime'{date_from}'")
-        if date_to:
-            validate_date(date_to, "date_to")
-            filters.append(f"Date le datetime'{date_to}'")
+        filters = [
+            "DepositTo eq 'Account'",
+            _ACCOUNT_FILTER.format(bank_account_id),
+            *date_filters(date_from, date_to),
+        ]
         params["$filter"] = " and ".join(filters)
         if orderby:
             params["$orderby"] = orderby
 
-        items = await app.client.request_paged(
+        items = await client.request_paged(
             "/Banking/ReceiveMoneyTxn", params=params, top=top
         )
         return pick_list(items, RECEIVE_MONEY_LIST_FIELDS)
@@ -215,8 +201,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         transaction_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET", f"/Banking/ReceiveMoneyTxn/{transaction_id}"
         )
         return pick(result, RECEIVE_MONEY_DETAIL_FIELDS)
@@ -241,10 +227,9 @@ def register(mcp: FastMCP) -> None:
         is_tax_inclusive: bool | None = None,
         deposit_to: str = "Account",
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
-        valid_deposit_to = {"Account", "UndepositedFunds"}
-        if deposit_to not in valid_deposit_to:
+        if deposit_to not in _VALID_DEPOSIT_TO:
             raise ValueError(
                 f"Invalid deposit_to '{deposit_to}'. "
                 f"Must be 'Account' or 'UndepositedFunds'."
@@ -254,27 +239,7 @@ def register(mcp: FastMCP) -> None:
                 "bank_account_id is required when deposit_to='Account'."
             )
 
-        lines: list[dict[str, Any]] = []
-        for i, item in enumerate(line_items):
-            if "account_id" not in item:
-                raise ValueError(f"Line item {i}: 'account_id' is required.")
-            if "amount" not in item:
-                raise ValueError(f"Line item {i}: 'amount' is required.")
-            if "tax_code_id" not in item:
-                raise ValueError(
-                    f"Line item {i}: 'tax_code_id' is required."
-                )
-            line: dict[str, Any] = {
-                "Account": {"UID": item["account_id"]},
-                "Amount": item["amount"],
-            }
-            if "description" in item:
-                line["Memo"] = item["description"]
-            if "tax_code_id" in item:
-                line["TaxCode"] = {"UID": item["tax_code_id"]}
-            if "job_id" in item:
-                line["Job"] = {"UID": item["job_id"]}
-            lines.append(line)
+        lines = map_lines(line_items, BANKING_LINE_SCHEMA, BANKING_LINE_REQUIRED)
 
         body: dict[str, Any] = {
             "Date": date,
@@ -290,10 +255,12 @@ def register(mcp: FastMCP) -> None:
         if is_tax_inclusive is not None:
             body["IsTaxInclusive"] = is_tax_inclusive
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", "/Banking/ReceiveMoneyTxn", json_body=body
         )
-        app.client.cache.invalidate("banking:")
+        # No banking list is cached, so there is nothing narrower to target;
+        # dropping the (empty) group keeps any future cached list honest
+        client.cache.invalidate("banking:")
         return (
             pick(result, RECEIVE_MONEY_CREATE_RESULT_FIELDS)
             if isinstance(result, dict)
@@ -308,8 +275,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         transaction_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET", f"/Banking/SpendMoneyTxn/{transaction_id}"
         )
         return pick(result, SPEND_MONEY_DETAIL_FIELDS)
@@ -333,36 +300,15 @@ def register(mcp: FastMCP) -> None:
         is_tax_inclusive: bool | None = None,
         pay_from: str = "Account",
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
-        valid_pay_from = {"Account", "ElectronicPayments"}
-        if pay_from not in valid_pay_from:
+        if pay_from not in _VALID_PAY_FROM:
             raise ValueError(
                 f"Invalid pay_from '{pay_from}'. "
                 f"Must be 'Account' or 'ElectronicPayments'."
             )
 
-        lines: list[dict[str, Any]] = []
-        for i, item in enumerate(line_items):
-            if "account_id" not in item:
-                raise ValueError(f"Line item {i}: 'account_id' is required.")
-            if "amount" not in item:
-                raise ValueError(f"Line item {i}: 'amount' is required.")
-            if "tax_code_id" not in item:
-                raise ValueError(
-                    f"Line item {i}: 'tax_code_id' is required."
-                )
-            line: dict[str, Any] = {
-                "Account": {"UID": item["account_id"]},
-                "Amount": item["amount"],
-            }
-            if "description" in item:
-                line["Memo"] = item["description"]
-            if "tax_code_id" in item:
-                line["TaxCode"] = {"UID": item["tax_code_id"]}
-            if "job_id" in item:
-                line["Job"] = {"UID": item["job_id"]}
-            lines.append(line)
+        lines = map_lines(line_items, BANKING_LINE_SCHEMA, BANKING_LINE_REQUIRED)
 
         body: dict[str, Any] = {
             "Date": date,
@@ -377,10 +323,11 @@ def register(mcp: FastMCP) -> None:
         if is_tax_inclusive is not None:
             body["IsTaxInclusive"] = is_tax_inclusive
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", "/Banking/SpendMoneyTxn", json_body=body
         )
-        app.client.cache.invalidate("banking:")
+        # As for receive money, no banking list is cached to target
+        client.cache.invalidate("banking:")
         return (
             pick(result, SPEND_MONEY_CREATE_RESULT_FIELDS)
             if isinstance(result, dict)
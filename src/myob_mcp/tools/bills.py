@@ -4,15 +4,19 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from ._context import api_client
 from ._filters import (
     escape_odata,
-    validate_date,
+    date_filters,
     fix_subtotal,
     pick,
     pick_list,
+    map_lines,
     BILL_LIST_FIELDS,
     BILL_DETAIL_FIELDS,
     CREATE_RESULT_FIELDS,
+    BILL_LINE_SCHEMA,
+    BILL_LINE_REQUIRED,
 )
 
 
@@ -34,15 +38,9 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         params: dict[str, str] = {}
-        filters: list[str] = []
-        if date_from:
-            validate_date(date_from, "date_from")
-            filters.append(f"Date ge datetime'{date_from}'")
-        if date_to:
-            validate_date(date_to, "date_to")
-            filters.append(f"Date le datetime'{date_to}'")
+        filters = date_filters(date_from, date_to)
         if status:
             filters.append(f"Status eq '{escape_odata(status)}'")
         if supplier_id:
@@ -61,10 +59,10 @@ def register(mcp: FastMCP) -> None:
         if orderby:
             params["$orderby"] = orderby
 
-        items = await app.client.request_paged(
+        items = await client.request_paged(
             "/Purchase/Bill", params=params, top=top
         )
-        return pick_list([fix_subtotal(i) for i in items], BILL_LIST_FIELDS)
+        return pick_list(map(fix_subtotal, items), BILL_LIST_FIELDS)
 
     @mcp.tool(
         description="Get detailed information about a specific purchase bill by its UID"
@@ -73,8 +71,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         bill_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request("GET", f"/Purchase/Bill/{bill_id}")
+        client = api_client(ctx)
+        result = await client.request("GET", f"/Purchase/Bill/{bill_id}")
         return pick(fix_subtotal(result), BILL_DETAIL_FIELDS)
 
     @mcp.tool(
@@ -89,19 +87,9 @@ def register(mcp: FastMCP) -> None:
         reference: str | None = None,
         notes: str | None = None,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
-        lines = []
-        for item in line_items:
-            line: dict[str, Any] = {
-                "Description": item["description"],
-                "Quantity": item["quantity"],
-                "UnitPrice": item["unit_price"],
-                "Account": {"UID": item["account_id"]},
-            }
-            if "tax_code_id" in item:
-                line["TaxCode"] = {"UID": item["tax_code_id"]}
-            lines.append(line)
+        lines = map_lines(line_items, BILL_LINE_SCHEMA, BILL_LINE_REQUIRED)
 
         body: dict[str, Any] = {
             "Supplier": {"UID": supplier_id},
@@ -114,8 +102,8 @@ def register(mcp: FastMCP) -> None:
         if notes:
             body["Comment"] = notes
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", "/Purchase/Bill/Item", json_body=body
         )
-        app.client.cache.invalidate("bills:")
+        client.cache.invalidate("bills:")
         return pick(result, CREATE_RESULT_FIELDS) if isinstance(result, dict) else result
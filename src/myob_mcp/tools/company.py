@@ -4,7 +4,8 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
-from ..cache import CACHE_TTL_COMPANY_FILES
+from ..cache import CACHE_STALE_TTL_REFERENCE, CACHE_TTL_COMPANY_FILES
+from ._context import api_client
 
 
 def register(mcp: FastMCP) -> None:
@@ -14,13 +15,14 @@ def register(mcp: FastMCP) -> None:
         "Useful for discovering available company file IDs."
     )
     async def list_company_files(ctx: Context) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET",
             "/",
             require_company_file=False,
             cache_key="company_files",
             cache_ttl=CACHE_TTL_COMPANY_FILES,
+            stale_ttl=CACHE_STALE_TTL_REFERENCE,
         )
         if isinstance(result, list):
             return result
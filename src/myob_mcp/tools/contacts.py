@@ -4,7 +4,8 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
-from ..cache import CACHE_TTL_CONTACTS
+from ..cache import CACHE_TTL_CONTACTS, make_key, make_key_prefix
+from ._context import api_client
 from ._filters import (
     escape_odata,
     pick,
@@ -14,6 +15,21 @@ from ._filters import (
     CREATE_RESULT_FIELDS,
 )
 
+_CONTACT_PATHS = {"Customer": "/Contact/Customer", "Supplier": "/Contact/Supplier"}
+
+# create_contact address argument key -> MYOB Address field
+_ADDRESS_FIELDS = (
+    ("street", "Street"),
+    ("city", "City"),
+    ("state", "State"),
+    ("postcode", "PostCode"),
+    ("country", "Country"),
+)
+
+
+def _project_contacts(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return pick_list(items, CONTACT_LIST_FIELDS)
+
 
 def register(mcp: FastMCP) -> None:
 
@@ -30,14 +46,9 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
-        if contact_type == "Customer":
-            path = "/Contact/Customer"
-        elif contact_type == "Supplier":
-            path = "/Contact/Supplier"
-        else:
-            path = "/Contact"
+        path = _CONTACT_PATHS.get(contact_type, "/Contact")
 
         params: dict[str, str] = {}
         filters: list[str] = []
@@ -55,15 +66,15 @@ def register(mcp: FastMCP) -> None:
         if orderby:
             params["$orderby"] = orderby
 
-        cache_key = f"contacts:{contact_type}:{is_active}:{search}:{top}:{orderby}"
-        items = await app.client.request_paged(
+        cache_key = make_key("contacts", path, is_active, search, top, orderby)
+        return await client.request_paged(
             path,
             params=params,
             top=top,
             cache_key=cache_key,
             cache_ttl=CACHE_TTL_CONTACTS,
+            transform=_project_contacts,
         )
-        return pick_list(items, CONTACT_LIST_FIELDS)
 
     @mcp.tool(
         description="Get detailed information about a specific contact by its UID"
@@ -72,8 +83,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         contact_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request("GET", f"/Contact/{contact_id}")
+        client = api_client(ctx)
+        result = await client.request("GET", f"/Contact/{contact_id}")
         return strip_metadata(result)
 
     @mcp.tool(
@@ -92,13 +103,10 @@ def register(mcp: FastMCP) -> None:
         phone: str | None = None,
         address: dict[str, str] | None = None,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
-        if contact_type == "Customer":
-            path = "/Contact/Customer"
-        elif contact_type == "Supplier":
-            path = "/Contact/Supplier"
-        else:
+        path = _CONTACT_PATHS.get(contact_type)
+        if path is None:
             raise ValueError("contact_type must be 'Customer' or 'Supplier'")
 
         body: dict[str, Any] = {"IsIndividual": is_individual}
@@ -114,30 +122,25 @@ def register(mcp: FastMCP) -> None:
         else:
             body["CompanyName"] = display_name
 
-        addresses: list[dict[str, Any]] = []
         addr_entry: dict[str, Any] = {"Location": 1}
         if email:
             addr_entry["Email"] = email
         if phone:
             addr_entry["Phone1"] = phone
         if address:
-            if "street" in address:
-                addr_entry["Street"] = address["street"]
-            if "city" in address:
-                addr_entry["City"] = address["city"]
-            if "state" in address:
-                addr_entry["State"] = address["state"]
-            if "postcode" in address:
-                addr_entry["PostCode"] = address["postcode"]
-            if "country" in address:
-                addr_entry["Country"] = address["country"]
+            addr_entry.update(
+                (out, address[key]) for key, out in _ADDRESS_FIELDS if key in address
+            )
 
         if len(addr_entry) > 1:  # More than just Location
-            addresses.append(addr_entry)
-            body["Addresses"] = addresses
+            body["Addresses"] = [addr_entry]
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", path, json_body=body
         )
-        app.client.cache.invalidate("contacts:")
+        # Only lists that can contain the new contact go stale: its own type
+        # and the unfiltered /Contact list
+        cache = client.cache
+        cache.invalidate(make_key_prefix("contacts", path))
+        cache.invalidate(make_key_prefix("contacts", "/Contact"))
         return pick(result, CREATE_RESULT_FIELDS) if isinstance(result, dict) else result
@@ -4,7 +4,8 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
-from ..cache import CACHE_TTL_EMPLOYEES
+from ..cache import CACHE_TTL_EMPLOYEES, make_key
+from ._context import api_client
 from ._filters import (
     escape_odata,
     pick_list,
@@ -12,6 +13,10 @@ from ._filters import (
 )
 
 
+def _project_employees(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return pick_list(items, EMPLOYEE_LIST_FIELDS)
+
+
 def register(mcp: FastMCP) -> None:
 
     @mcp.tool(
@@ -26,7 +31,7 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         params: dict[str, str] = {}
         filters: list[str] = []
@@ -43,12 +48,12 @@ def register(mcp: FastMCP) -> None:
         if orderby:
             params["$orderby"] = orderby
 
-        cache_key = f"employees:{is_active}:{search}:{top}:{orderby}"
-        items = await app.client.request_paged(
+        cache_key = make_key("employees", is_active, search, top, orderby)
+        return await client.request_paged(
             "/Contact/Employee",
             params=params,
             top=top,
             cache_key=cache_key,
             cache_ttl=CACHE_TTL_EMPLOYEES,
+            transform=_project_employees,
         )
-        return pick_list(items, EMPLOYEE_LIST_FIELDS)
@@ -4,20 +4,18 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from ..cache import CACHE_TTL_LAYOUT, make_key
+from ._context import api_client
 from ._filters import (
-    escape_odata,
-    validate_date,
     fix_subtotal,
     pick,
-    pick_list,
     build_lines,
-    INVOICE_LIST_FIELDS,
+    coerce_layout,
+    VALID_LAYOUTS,
     INVOICE_DETAIL_FIELDS,
     CREATE_RESULT_FIELDS,
 )
-
-
-_VALID_LAYOUTS = {"Item", "Service"}
+from ._sales import INVOICE, fetch_sale_list
 
 
 def register(mcp: FastMCP) -> None:
@@ -37,30 +35,10 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
-        params: dict[str, str] = {}
-        filters: list[str] = []
-        if date_from:
-            validate_date(date_from, "date_from")
-            filters.append(f"Date ge datetime'{date_from}'")
-        if date_to:
-            validate_date(date_to, "date_to")
-            filters.append(f"Date le datetime'{date_to}'")
-        if status:
-            filters.append(f"Status eq '{escape_odata(status)}'")
-        if customer_id:
-            filters.append(f"Customer/UID eq guid'{customer_id}'")
-        if search:
-            filters.append(f"substringof('{escape_odata(search)}', Number) eq true")
-        if filters:
-            params["$filter"] = " and ".join(filters)
-        if orderby:
-            params["$orderby"] = orderby
-
-        items = await app.client.request_paged(
-            "/Sale/Invoice", params=params, top=top
+        return await fetch_sale_list(
+            INVOICE, api_client(ctx),
+            date_from, date_to, status, customer_id, search, top, orderby,
         )
-        return pick_list([fix_subtotal(i) for i in items], INVOICE_LIST_FIELDS)
 
     @mcp.tool(
         description="Get detailed information about a specific sales invoice by its UID"
@@ -69,16 +47,26 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         invoice_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         # The generic /Sale/Invoice/{id} endpoint returns a reduced field set
         # (no Lines, etc.).  Fetch it first to discover the layout, then
-        # re-fetch from the layout-specific endpoint for full detail.
-        summary = await app.client.request("GET", f"/Sale/Invoice/{invoice_id}")
-        layout = summary.get("InvoiceType", "Item")
-        if layout not in _VALID_LAYOUTS:
-            layout = "Item"
-        result = await app.client.request(
-            "GET", f"/Sale/Invoice/{layout}/{invoice_id}"
+        # re-fetch from the layout-specific endpoint for full detail.  The
+        # layout is remembered (also from list_invoices), skipping the first
+        # request next time.
+        layout_key = make_key(INVOICE.layout_group, invoice_id)
+        cache = client.cache
+        layout = cache.get(layout_key)
+        if layout is None:
+            summary = await client.request(
+                "GET", f"/Sale/Invoice/{invoice_id}", conditional=True
+            )
+            layout = summary.get("InvoiceType", "Item")
+            if layout in VALID_LAYOUTS:
+                cache.set(layout_key, layout, CACHE_TTL_LAYOUT)
+            else:
+                layout = "Item"
+        result = await client.request(
+            "GET", f"/Sale/Invoice/{layout}/{invoice_id}", conditional=True
         )
         return pick(fix_subtotal(result), INVOICE_DETAIL_FIELDS)
 
@@ -104,13 +92,9 @@ def register(mcp: FastMCP) -> None:
         ship_to_address: str | None = None,
         customer_purchase_order_number: str | None = None,
     ) -> dict[str, Any]:
-        invoice_layout = invoice_layout.capitalize()
-        if invoice_layout not in _VALID_LAYOUTS:
-            raise ValueError(
-                f"Invalid invoice_layout '{invoice_layout}'. Must be 'Item' or 'Service'."
-            )
+        invoice_layout = coerce_layout(invoice_layout, "invoice_layout")
 
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         lines = build_lines(line_items, invoice_layout)
 
@@ -133,8 +117,11 @@ def register(mcp: FastMCP) -> None:
         if customer_purchase_order_number is not None:
             body["CustomerPurchaseOrderNumber"] = customer_purchase_order_number
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", f"/Sale/Invoice/{invoice_layout}", json_body=body
         )
-        app.client.cache.invalidate("invoices:")
+        # Invoice list keys lead with the date range, which a new invoice can
+        # fall into whatever the bounds, so no key prefix is narrower than the
+        # whole group. Remembered layouts live in their own group and survive.
+        client.cache.invalidate("invoices:")
         return pick(result, CREATE_RESULT_FIELDS) if isinstance(result, dict) else result
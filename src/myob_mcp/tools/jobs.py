@@ -4,13 +4,24 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
-from ..cache import CACHE_TTL_JOBS
+from ..cache import CACHE_TTL_JOBS, make_key
+from ._context import api_client
 from ._filters import (
     escape_odata,
     pick_list,
     JOB_LIST_FIELDS,
 )
 
+_IS_ACTIVE_FILTER = {True: "IsActive eq true", False: "IsActive eq false"}
+_SEARCH_FILTER = (
+    "(substringof('{s}', tolower(Name)) eq true"
+    " or substringof('{s}', tolower(Number)) eq true)"
+)
+
+
+def _project_jobs(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return pick_list(items, JOB_LIST_FIELDS)
+
 
 def register(mcp: FastMCP) -> None:
 
@@ -26,29 +37,27 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         params: dict[str, str] = {}
         filters: list[str] = []
         if is_active is not None:
-            filters.append(f"IsActive eq {'true' if is_active else 'false'}")
+            filters.append(_IS_ACTIVE_FILTER[bool(is_active)])
         if search:
-            safe = escape_odata(search).lower()
-            filters.append(
-                f"(substringof('{safe}', tolower(Name)) eq true"
-                f" or substringof('{safe}', tolower(Number)) eq true)"
-            )
-        if filters:
+            filters.append(_SEARCH_FILTER.format(s=escape_odata(search).lower()))
+        if len(filters) == 1:
+            params["$filter"] = filters[0]
+        elif filters:
             params["$filter"] = " and ".join(filters)
         if orderby:
             params["$orderby"] = orderby
 
-        cache_key = f"jobs:{is_active}:{search}:{top}:{orderby}"
-        items = await app.client.request_paged(
+        cache_key = make_key("jobs", is_active, search, top, orderby)
+        return await client.request_paged(
             "/GeneralLedger/Job",
             params=params,
             top=top,
             cache_key=cache_key,
             cache_ttl=CACHE_TTL_JOBS,
+            transform=_project_jobs,
         )
-        return pick_list(items, JOB_LIST_FIELDS)
@@ -4,7 +4,9 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from ._context import api_client
 from ._filters import (
+    date_filters,
     validate_date,
     pick,
     pick_list,
@@ -18,16 +20,35 @@ from ._filters import (
 )
 
 
-_VALID_PAYMENT_METHODS = {
+_VALID_PAYMENT_METHODS = frozenset((
     "CreditCard",
     "Cash",
     "Cheque",
     "BankDeposit",
     "ElectronicPayments",
-}
+))
+_PAYMENT_METHODS_MSG = ", ".join(sorted(_VALID_PAYMENT_METHODS))
 
 
-_VALID_SUPPLIER_PAY_FROM = {"Account", "ElectronicPayments"}
+_VALID_SUPPLIER_PAY_FROM = frozenset(("Account", "ElectronicPayments"))
+_SUPPLIER_PAY_FROM_MSG = ", ".join(sorted(_VALID_SUPPLIER_PAY_FROM))
+
+_INVOICE_ENTRY_KEYS = ("invoice_id", "amount_applied")
+_BILL_ENTRY_KEYS = ("bill_id", "amount_applied")
+
+
+def _check_entries(
+    entries: list[dict[str, Any]], required: tuple[str, ...], label: str
+) -> None:
+    """Raise if any entry lacks a required key, naming every missing key."""
+    required_set = frozenset(required)
+    for i, entry in enumerate(entries):
+        if not required_set <= entry.keys():
+            missing = [f"'{k}'" for k in required if k not in entry]
+            verb = "is" if len(missing) == 1 else "are"
+            raise ValueError(
+                f"{label} entry {i}: {', '.join(missing)} {verb} required."
+            )
 
 
 def register(mcp: FastMCP) -> None:
@@ -46,25 +67,20 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         params: dict[str, str] = {}
         filters: list[str] = []
         if bank_account_id:
             filters.append(f"Account/UID eq guid'{bank_account_id}'")
         if customer_id:
             filters.append(f"Customer/UID eq guid'{customer_id}'")
-        if date_from:
-            validate_date(date_from, "date_from")
-            filters.append(f"Date ge datetime'{date_from}'")
-        if date_to:
-            validate_date(date_to, "date_to")
-            filters.append(f"Date le datetime'{date_to}'")
+        filters += date_filters(date_from, date_to)
         if filters:
             params["$filter"] = " and ".join(filters)
         if orderby:
             params["$orderby"] = orderby
 
-        items = await app.client.request_paged(
+        items = await client.request_paged(
             "/Sale/CustomerPayment", params=params, top=top
         )
         return pick_list(items, CUSTOMER_PAYMENT_LIST_FIELDS)
@@ -77,8 +93,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         payment_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET", f"/Sale/CustomerPayment/{payment_id}"
         )
         return pick(result, CUSTOMER_PAYMENT_DETAIL_FIELDS)
@@ -99,33 +115,24 @@ def register(mcp: FastMCP) -> None:
         memo: str | None = None,
         payment_method: str = "BankDeposit",
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         validate_date(payment_date, "payment_date")
 
         if payment_method not in _VALID_PAYMENT_METHODS:
             raise ValueError(
                 f"Invalid payment_method '{payment_method}'. "
-                f"Must be one of: {', '.join(sorted(_VALID_PAYMENT_METHODS))}."
+                f"Must be one of: {_PAYMENT_METHODS_MSG}."
             )
 
         if not invoices:
             raise ValueError("At least one invoice is required.")
 
-        invoice_lines: list[dict[str, Any]] = []
-        for i, inv in enumerate(invoices):
-            if "invoice_id" not in inv:
-                raise ValueError(
-                    f"Invoice entry {i}: 'invoice_id' is required."
-                )
-            if "amount_applied" not in inv:
-                raise ValueError(
-                    f"Invoice entry {i}: 'amount_applied' is required."
-                )
-            invoice_lines.append({
-                "UID": inv["invoice_id"],
-                "AmountApplied": inv["amount_applied"],
-            })
+        _check_entries(invoices, _INVOICE_ENTRY_KEYS, "Invoice")
+        invoice_lines = [
+            {"UID": inv["invoice_id"], "AmountApplied": inv["amount_applied"]}
+            for inv in invoices
+        ]
 
         body: dict[str, Any] = {
             "Customer": {"UID": customer_id},
@@ -138,10 +145,10 @@ def register(mcp: FastMCP) -> None:
         if memo:
             body["Memo"] = memo
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", "/Sale/CustomerPayment", json_body=body
         )
-        app.client.cache.invalidate("invoices:")
+        client.cache.invalidate("invoices:")
         return (
             pick(result, CUSTOMER_PAYMENT_CREATE_RESULT_FIELDS)
             if isinstance(result, dict)
@@ -163,14 +170,14 @@ def register(mcp: FastMCP) -> None:
         memo: str | None = None,
         payment_method: str = "BankDeposit",
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         validate_date(payment_date, "payment_date")
 
         if payment_method not in _VALID_PAYMENT_METHODS:
             raise ValueError(
                 f"Invalid payment_method '{payment_method}'. "
-                f"Must be one of: {', '.join(sorted(_VALID_PAYMENT_METHODS))}."
+                f"Must be one of: {_PAYMENT_METHODS_MSG}."
             )
 
         body: dict[str, Any] = {
@@ -191,10 +198,10 @@ def register(mcp: FastMCP) -> None:
         if memo:
             body["Memo"] = memo
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", "/Sale/CustomerPayment", json_body=body
         )
-        app.client.cache.invalidate("sales_orders:")
+        client.cache.invalidate("sales_orders:")
         return (
             pick(result, SALES_ORDER_DEPOSIT_CREATE_RESULT_FIELDS)
             if isinstance(result, dict)
@@ -219,12 +226,11 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         params: dict[str, str] = {}
         filters: list[str] = []
         if pay_from:
-            valid = {"Account", "ElectronicPayments"}
-            if pay_from not in valid:
+            if pay_from not in _VALID_SUPPLIER_PAY_FROM:
                 raise ValueError(
                     f"Invalid pay_from '{pay_from}'. "
                     f"Must be 'Account' or 'ElectronicPayments'."
@@ -236,18 +242,13 @@ def register(mcp: FastMCP) -> None:
             filters.append(f"Account/UID eq guid'{bank_account_id}'")
         if supplier_id:
             filters.append(f"Supplier/UID eq guid'{supplier_id}'")
-        if date_from:
-            validate_date(date_from, "date_from")
-            filters.append(f"Date ge datetime'{date_from}'")
-        if date_to:
-            validate_date(date_to, "date_to")
-            filters.append(f"Date le datetime'{date_to}'")
+        filters += date_filters(date_from, date_to)
         if filters:
             params["$filter"] = " and ".join(filters)
         if orderby:
             params["$orderby"] = orderby
 
-        items = await app.client.request_paged(
+        items = await client.request_paged(
             "/Purchase/SupplierPayment", params=params, top=top
         )
         return pick_list(items, SUPPLIER_PAYMENT_LIST_FIELDS)
@@ -260,8 +261,8 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         payment_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
-        result = await app.client.request(
+        client = api_client(ctx)
+        result = await client.request(
             "GET", f"/Purchase/SupplierPayment/{payment_id}"
         )
         return pick(result, SUPPLIER_PAYMENT_DETAIL_FIELDS)
@@ -284,33 +285,27 @@ def register(mcp: FastMCP) -> None:
         memo: str | None = None,
         pay_from: str = "Account",
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         validate_date(payment_date, "payment_date")
 
         if pay_from not in _VALID_SUPPLIER_PAY_FROM:
             raise ValueError(
                 f"Invalid pay_from '{pay_from}'. "
-                f"Must be one of: {', '.join(sorted(_VALID_SUPPLIER_PAY_FROM))}."
+                f"Must be one of: {_SUPPLIER_PAY_FROM_MSG}."
             )
 
         if not bills:
             raise ValueError("At least one bill is required.")
 
-        bill_lines: list[dict[str, Any]] = []
-        for i, bill in enumerate(bills):
-            if "bill_id" not in bill:
-                raise ValueError(
-                    f"Bill entry {i}: 'bill_id' is required."
-                )
-            if "amount_applied" not in bill:
-                raise ValueError(
-                    f"Bill entry {i}: 'amount_applied' is required."
-                )
-            bill_lines.append({
+        _check_entries(bills, _BILL_ENTRY_KEYS, "Bill")
+        bill_lines = [
+            {
                 "Purchase": {"UID": bill["bill_id"]},
                 "AmountApplied": bill["amount_applied"],
-            })
+            }
+            for bill in bills
+        ]
 
         body: dict[str, Any] = {
             "Supplier": {"UID": supplier_id},
@@ -323,10 +318,10 @@ def register(mcp: FastMCP) -> None:
         if memo:
             body["Memo"] = memo
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", "/Purchase/SupplierPayment", json_body=body
         )
-        app.client.cache.invalidate("bills:")
+        client.cache.invalidate("bills:")
         return (
             pick(result, SUPPLIER_PAYMENT_CREATE_RESULT_FIELDS)
             if isinstance(result, dict)
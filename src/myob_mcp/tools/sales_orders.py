@@ -4,21 +4,20 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
+from ..cache import CACHE_TTL_LAYOUT, make_key
+from ._context import api_client
 from ._filters import (
-    escape_odata,
-    validate_date,
     fix_subtotal,
     pick,
-    pick_list,
     build_lines,
-    SALES_ORDER_LIST_FIELDS,
+    coerce_layout,
+    VALID_LAYOUTS,
     SALES_ORDER_DETAIL_FIELDS,
     CREATE_RESULT_FIELDS,
 )
+from ._sales import SALES_ORDER, fetch_sale_list
 
 
-_VALID_LAYOUTS = {"Item", "Service"}
-
 # Fields safe to include in PUT body for sales order updates.
 _PUT_SAFE_FIELDS = {
     "RowVersion",
@@ -62,30 +61,10 @@ def register(mcp: FastMCP) -> None:
         top: int | None = None,
         orderby: str | None = None,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
-        params: dict[str, str] = {}
-        filters: list[str] = []
-        if date_from:
-            validate_date(date_from, "date_from")
-            filters.append(f"Date ge datetime'{date_from}'")
-        if date_to:
-            validate_date(date_to, "date_to")
-            filters.append(f"Date le datetime'{date_to}'")
-        if status:
-            filters.append(f"Status eq '{escape_odata(status)}'")
-        if customer_id:
-            filters.append(f"Customer/UID eq guid'{customer_id}'")
-        if search:
-            filters.append(f"substringof('{escape_odata(search)}', Number) eq true")
-        if filters:
-            params["$filter"] = " and ".join(filters)
-        if orderby:
-            params["$orderby"] = orderby
-
-        items = await app.client.request_paged(
-            "/Sale/Order", params=params, top=top
+        return await fetch_sale_list(
+            SALES_ORDER, api_client(ctx),
+            date_from, date_to, status, customer_id, search, top, orderby,
         )
-        return pick_list([fix_subtotal(i) for i in items], SALES_ORDER_LIST_FIELDS)
 
     @mcp.tool(
         description="Get detailed information about a specific sales order by its UID"
@@ -94,17 +73,27 @@ def register(mcp: FastMCP) -> None:
         ctx: Context,
         sales_order_id: str,
     ) -> dict[str, Any]:
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
         # The generic /Sale/Order/{id} endpoint returns a reduced field set
         # (no ShipToAddress, Lines, etc.).  Fetch it first to discover the
         # layout, then re-fetch from the layout-specific endpoint which
-        # returns the full detail including ShipToAddress.
-        summary = await app.client.request("GET", f"/Sale/Order/{sales_order_id}")
-        layout = summary.get("OrderType", "Item")
-        if layout not in _VALID_LAYOUTS:
-            layout = "Item"
-        result = await app.client.request(
-            "GET", f"/Sale/Order/{layout}/{sales_order_id}"
+        # returns the full detail including ShipToAddress.  The layout is
+        # remembered (also from list_sales_orders), skipping the first
+        # request next time.
+        layout_key = make_key(SALES_ORDER.layout_group, sales_order_id)
+        cache = client.cache
+        layout = cache.get(layout_key)
+        if layout is None:
+            summary = await client.request(
+                "GET", f"/Sale/Order/{sales_order_id}", conditional=True
+            )
+            layout = summary.get("OrderType", "Item")
+            if layout in VALID_LAYOUTS:
+                cache.set(layout_key, layout, CACHE_TTL_LAYOUT)
+            else:
+                layout = "Item"
+        result = await client.request(
+            "GET", f"/Sale/Order/{layout}/{sales_order_id}", conditional=True
         )
         return pick(fix_subtotal(result), SALES_ORDER_DETAIL_FIELDS)
 
@@ -132,13 +121,9 @@ def register(mcp: FastMCP) -> None:
         salesperson_id: str | None = None,
         due_date: str | None = None,
     ) -> dict[str, Any]:
-        order_layout = order_layout.capitalize()
-        if order_layout not in _VALID_LAYOUTS:
-            raise ValueError(
-                f"Invalid order_layout '{order_layout}'. Must be 'Item' or 'Service'."
-            )
+        order_layout = coerce_layout(order_layout, "order_layout")
 
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         lines = build_lines(line_items, order_layout)
 
@@ -162,10 +147,10 @@ def register(mcp: FastMCP) -> None:
         if salesperson_id is not None:
             body["Salesperson"] = {"UID": salesperson_id}
 
-        result = await app.client.request(
+        result = await client.request(
             "POST", f"/Sale/Order/{order_layout}", json_body=body
         )
-        app.client.cache.invalidate("sales_orders:")
+        client.cache.invalidate("sales_orders:")
         return pick(result, CREATE_RESULT_FIELDS) if isinstance(result, dict) else result
 
     @mcp.tool(
@@ -193,22 +178,19 @@ def register(mcp: FastMCP) -> None:
         salesperson_id: str | None = None,
         due_date: str | None = None,
     ) -> dict[str, Any]:
-        order_layout = order_layout.capitalize()
-        if order_layout not in _VALID_LAYOUTS:
-            raise ValueError(
-                f"Invalid order_layout '{order_layout}'. Must be 'Item' or 'Service'."
-            )
+        order_layout = coerce_layout(order_layout, "order_layout")
 
-        app = ctx.request_context.lifespan_context
+        client = api_client(ctx)
 
         # Fetch full current order (unfiltered — needs RowVersion for PUT)
-        current = await app.client.request(
-            "GET", f"/Sale/Order/{sales_order_id}"
+        current = await client.request(
+            "GET", f"/Sale/Order/{sales_order_id}", conditional=True
         )
 
-        if current.get("Status") != "Open":
+        status = current.get("Status")
+        if status != "Open":
             raise ValueError(
-                f"Cannot edit order with status '{current.get('Status')}'. "
+                f"Cannot edit order with status '{status}'. "
                 "Only orders with status 'Open' can be edited."
             )
 
@@ -219,6 +201,23 @@ def register(mcp: FastMCP) -> None:
                 f"order_layout='{order_layout}' was specified."
             )
 
+        if line_items is None and all(
+            value is None
+            for value in (
+                date,
+                customer_id,
+                number,
+                comment,
+                ship_to_address,
+                is_tax_inclusive,
+                due_date,
+                customer_purchase_order_number,
+                salesperson_id,
+            )
+        ):
+            # Nothing to change: skip the PUT round-trip
+            return pick(current, CREATE_RESULT_FIELDS)
+
         # Build PUT body from whitelist of known mutable fields only.
         # Avoids sending read-only fields (UID, URI, Status, Subtotal, etc.)
         body: dict[str, Any] = {}
@@ -255,8 +254,8 @@ def register(mcp: FastMCP) -> None:
         if line_items is not None:
             body["Lines"] = build_lines(line_items, order_layout)
 
-        result = await app.client.request(
+        result = await client.request(
             "PUT", f"/Sale/Order/{order_layout}/{sales_order_id}", json_body=body
         )
-        app.client.cache.invalidate("sales_orders:")
+        client.cache.invalidate("sales_orders:")
         return pick(result, CREATE_RESULT_FIELDS) if isinstance(result, dict) else result
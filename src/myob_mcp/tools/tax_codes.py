@@ -4,10 +4,15 @@ from typing import Any
 
 from mcp.server.fastmcp import Context, FastMCP
 
-from ..cache import CACHE_TTL_TAX_CODES
+from ..cache import CACHE_STALE_TTL_REFERENCE, CACHE_TTL_TAX_CODES
+from ._context import api_client
 from ._filters import pick_list, TAX_CODE_LIST_FIELDS
 
 
+def _project_tax_codes(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return pick_list(items, TAX_CODE_LIST_FIELDS)
+
+
 def register(mcp: FastMCP) -> None:
 
     @mcp.tool(
@@ -19,10 +24,11 @@ def register(mcp: FastMCP) -> None:
     async def list_tax_codes(
         ctx: Context,
     ) -> list[dict[str, Any]]:
-        app = ctx.request_context.lifespan_context
-        items = await app.client.request_paged(
+        client = api_client(ctx)
+        return await client.request_paged(
             "/GeneralLedger/TaxCode",
             cache_key="tax_codes",
             cache_ttl=CACHE_TTL_TAX_CODES,
+            stale_ttl=CACHE_STALE_TTL_REFERENCE,
+            transform=_project_tax_codes,
         )
-        return pick_list(items, TAX_CODE_LIST_FIELDS)
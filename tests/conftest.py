@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import httpx
+import pytest
+from mcp.server.fastmcp import FastMCP
+
+from myob_mcp import api_client as api_client_module
+from myob_mcp import cache as cache_module
+from myob_mcp.api_client import MyobApiClient
+from myob_mcp.cache import TTLCache
+from myob_mcp.config import MyobConfig
+
+COMPANY_FILE_ID = "cf-1"
+BASE_URL = f"{api_client_module.API_BASE_URL}/{COMPANY_FILE_ID}"
+
+
+class FakeAuth:
+    """Stands in for MyobAuth: a fixed bearer that a refresh replaces."""
+
+    def __init__(self) -> None:
+        self._tokens: dict[str, Any] = {}
+        self.bearer = "Bearer first"
+        self.refreshes = 0
+
+    def get_bearer_sync(self) -> str | None:
+        return self.bearer
+
+    async def get_bearer(self) -> str:
+        return self.bearer
+
+    async def refresh_rejected_token(self, rejected_bearer: str) -> None:
+        self.refreshes += 1
+        self.bearer = f"Bearer refreshed-{self.refreshes}"
+
+
+Handler = Callable[[httpx.Request], Any]
+
+
+class Clock:
+    """A settable replacement for the cache's ``time.monotonic``."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    # Patch the cache's view of time only, leaving the event loop's clock
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api_client_module, "_backoff_delay", lambda attempt: 0)
+
+
+@pytest.fixture
+def make_client() -> Callable[[Handler], MyobApiClient]:
+    """Build a client whose HTTP traffic goes to ``handler``.
+
+    ``handler`` receives each ``httpx.Request`` and returns an
+    ``httpx.Response`` (it may be sync or async).
+    """
+
+    def make(handler: Handler) -> MyobApiClient:
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        config = MyobConfig(
+            "client-id", "secret", default_company_file_id=COMPANY_FILE_ID
+        )
+        return MyobApiClient(config, FakeAuth(), TTLCache(), http_client=http_client)
+
+    return make
+
+
+def tool(module: Any, name: str) -> Callable[..., Any]:
+    """Register a tool module on a throwaway server and return tool ``name``."""
+    mcp = FastMCP("test")
+    module.register(mcp)
+    return mcp._tool_manager.get_tool(name).fn
+
+
+def context(client: MyobApiClient) -> Any:
+    """A tool call context whose lifespan holds ``client``."""
+    return SimpleNamespace(
+        request_context=SimpleNamespace(lifespan_context=SimpleNamespace(client=client))
+    )
@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from myob_mcp import api_client as api_client_module
+from myob_mcp.api_client import MyobApiError, _parse_retry_after, _ttl_from_cache_control
+
+from .conftest import BASE_URL, COMPANY_FILE_ID, Clock
+
+
+def _json(status: int = 200, body: object = None, **headers: str) -> httpx.Response:
+    return httpx.Response(status, json=body if body is not None else {}, headers=headers)
+
+
+# Retries
+
+
+async def test_get_retries_server_errors(make_client):
+    statuses = iter([503, 502, 200])
+    client = make_client(lambda request: _json(next(statuses), {"ok": True}))
+
+    assert await client.request("GET", "/Contact") == {"ok": True}
+
+
+async def test_write_gets_one_transient_retry(make_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _json(503)
+
+    client = make_client(handler)
+
+    with pytest.raises(MyobApiError) as exc_info:
+        await client.request("POST", "/Sale/Invoice/Item", json_body={"a": 1})
+    assert exc_info.value.status_code == 503
+    assert len(calls) == 2
+
+
+async def test_401_refresh_does_not_use_the_retry_budget(make_client):
+    # A write whose token expired still gets its one transient retry
+    statuses = iter([401, 503, 201])
+    sent_auth = []
+
+    def handler(request):
+        sent_auth.append(request.headers["Authorization"])
+        return _json(next(statuses), {"UID": "new"})
+
+    client = make_client(handler)
+
+    result = await client.request("POST", "/Sale/Invoice/Item", json_body={"a": 1})
+    assert result == {"UID": "new"}
+    assert client.auth.refreshes == 1
+    assert sent_auth == ["Bearer first", "Bearer refreshed-1", "Bearer refreshed-1"]
+
+
+async def test_second_401_is_raised(make_client):
+    client = make_client(lambda request: _json(401))
+
+    with pytest.raises(MyobApiError) as exc_info:
+        await client.request("GET", "/Contact")
+    assert exc_info.value.status_code == 401
+    assert client.auth.refreshes == 1
+
+
+async def test_write_sends_return_body(make_client):
+    seen = []
+
+    def handler(request):
+        seen.append(request.url)
+        return _json(201)
+
+    client = make_client(handler)
+
+    await client.request("PUT", "/Contact/Customer/1", json_body={})
+    assert str(seen[0]) == f"{BASE_URL}/Contact/Customer/1?returnBody=true"
+
+
+@pytest.fixture
+def wall_clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """Fix the wall-clock time Retry-After dates are measured against."""
+    clock = Clock()
+    clock.now = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+    monkeypatch.setattr(api_client_module, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+def _http_date(timestamp: float) -> str:
+    return format_datetime(datetime.fromtimestamp(timestamp, timezone.utc), usegmt=True)
+
+
+def test_parse_retry_after_seconds():
+    assert _parse_retry_after("7") == 7.0
+    assert _parse_retry_after(" 2.5 ") == 2.5
+    assert _parse_retry_after("-3") == 0.0
+
+
+def test_parse_retry_after_http_date(wall_clock):
+    assert _parse_retry_after(_http_date(wall_clock.now + 30)) == pytest.approx(30)
+    # A date already in the past means retry now
+    assert _parse_retry_after(_http_date(wall_clock.now - 30)) == 0.0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "Fri, 99 Foo 2026"])
+def test_parse_retry_after_rejects_garbage(value):
+    assert _parse_retry_after(value) is None
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Record retry sleeps instead of waiting."""
+    recorded: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        recorded.append(delay)
+
+    monkeypatch.setattr(api_client_module.asyncio, "sleep", sleep)
+    return recorded
+
+
+@pytest.mark.parametrize(
+    "retry_after, expected",
+    [("3", [3.0]), ("600", [api_client_module.RETRY_AFTER_MAX_DELAY]), ("soon", [0])],
+)
+async def test_429_waits_for_retry_after(make_client, sleeps, retry_after, expected):
+    responses = iter([_json(429, **{"Retry-After": retry_after}), _json(200, {"ok": True})])
+    client = make_client(lambda request: next(responses))
+
+    assert await client.request("GET", "/Contact") == {"ok": True}
+    # Unparseable values fall back to the (patched, zero) backoff
+    assert sleeps == expected
+
+
+async def test_429_waits_until_retry_after_date(make_client, sleeps, wall_clock):
+    responses = iter([
+        _json(429, **{"Retry-After": _http_date(wall_clock.now + 12)}),
+        _json(200, {"ok": True}),
+    ])
+    client = make_client(lambda request: next(responses))
+
+    assert await client.request("GET", "/Contact") == {"ok": True}
+    assert sleeps == [pytest.approx(12)]
+
+
+# Coalescing
+
+
+def _held(calls: list, release: asyncio.Event):
+    """Handler that records each request and answers once ``release`` is set."""
+
+    async def handler(request):
+        calls.append(request)
+        await release.wait()
+        return _json(200, {"path": request.url.path})
+
+    return handler
+
+
+async def test_identical_gets_share_one_fetch(make_client):
+    calls, release = [], asyncio.Event()
+    client = make_client(_held(calls, release))
+
+    tasks = [
+        asyncio.create_task(client.request("GET", "/Contact/1")),
+        asyncio.create_task(client.request("GET", "/Contact/1", company_file_id=COMPANY_FILE_ID)),
+        asyncio.create_task(client.request("GET", "/Contact/2")),
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    first, second, other = await asyncio.gather(*tasks)
+
+    assert len(calls) == 2
+    assert first is second
+    assert other["path"].endswith("/Contact/2")
+    assert client._inflight == {}
+
+
+async def test_gets_with_different_cache_options_are_not_shared(make_client):
+    calls, release = [], asyncio.Event()
+    client = make_client(_held(calls, release))
+
+    tasks = [
+        asyncio.create_task(client.request("GET", "/Contact/1")),
+        asyncio.create_task(client.request("GET", "/Contact/1", conditional=True)),
+        asyncio.create_task(
+            client.request("GET", "/Contact/1", cache_key="contacts:1", cache_ttl=60)
+        ),
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert len(calls) == 3
+    # The cached call stored its own result despite racing the uncached ones
+    assert client.cache.get("contacts:1") is not None
+
+
+async def test_cancelled_caller_does_not_fail_the_others(make_client):
+    calls, release = [], asyncio.Event()
+    client = make_client(_held(calls, release))
+
+    cancelled = asyncio.create_task(client.request("GET", "/Contact/1"))
+    survivor = asyncio.create_task(client.request("GET", "/Contact/1"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+
+    assert (await survivor)["path"].endswith("/Contact/1")
+    assert cancelled.cancelled()
+    assert len(calls) == 1
+
+
+async def test_writes_are_never_coalesced(make_client):
+    calls, release = [], asyncio.Event()
+    client = make_client(_held(calls, release))
+
+    tasks = [
+        asyncio.create_task(client.request("POST", "/Contact/Customer", json_body={}))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert len(calls) == 2
+
+
+# Paged fetches
+
+
+def _collection(items: list, calls: list, *, count: bool = True):
+    """Handler serving ``items`` as a MYOB collection, honouring $top/$skip."""
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0)
+        top = int(request.url.params["$top"])
+        skip = int(request.url.params.get("$skip", 0))
+        body = {"Items": items[skip : skip + top]}
+        if count:
+            body["Count"] = len(items)
+        return _json(200, body)
+
+    return handler
+
+
+@pytest.mark.parametrize("count", [True, False])
+async def test_paged_fetch_collects_every_page(make_client, count):
+    items = [{"UID": str(i)} for i in range(1000)]
+    calls = []
+    client = make_client(_collection(items, calls, count=count))
+
+    result = await client.request_paged("/Contact", max_items=2000)
+
+    assert result == items
+    skips = sorted(int(c.url.params.get("$skip", 0)) for c in calls)
+    assert skips[:3] == [0, 400, 800]
+
+
+async def test_paged_transform_runs_per_page(make_client):
+    items = [{"UID": str(i), "Junk": i} for i in range(500)]
+    pages = []
+
+    def transform(page):
+        pages.append(len(page))
+        return [item["UID"] for item in page]
+
+    client = make_client(_collection(items, []))
+
+    result = await client.request_paged("/Contact", transform=transform)
+
+    assert result == [str(i) for i in range(500)]
+    assert sorted(pages) == [100, 400]
+
+
+async def test_paged_calls_share_a_fetch_only_with_the_same_transform(make_client):
+    items = [{"UID": str(i)} for i in range(10)]
+    calls = []
+    client = make_client(_collection(items, calls))
+
+    def uids(page):
+        return [item["UID"] for item in page]
+
+    def counted(page):
+        return [len(item) for item in page]
+
+    a, b, c = await asyncio.gather(
+        client.request_paged("/Contact", transform=uids),
+        client.request_paged("/Contact", company_file_id=COMPANY_FILE_ID, transform=uids),
+        client.request_paged("/Contact", transform=counted),
+    )
+
+    assert len(calls) == 2
+    assert a is b
+    assert c == [1] * 10
+
+
+async def test_paged_result_is_cached(make_client):
+    calls = []
+    client = make_client(_collection([{"UID": "1"}], calls))
+
+    first = await client.request_paged("/Contact", cache_key="contacts:x", cache_ttl=60)
+    second = await client.request_paged("/Contact", cache_key="contacts:x", cache_ttl=60)
+
+    assert first is second
+    assert len(calls) == 1
+
+
+# Stale-while-revalidate
+
+
+async def _settle(client) -> None:
+    """Wait for any background revalidation to finish."""
+    await asyncio.gather(*list(client._revalidating.values()))
+
+
+async def test_stale_value_is_served_while_refreshing(make_client, clock):
+    versions = iter([1, 2])
+    client = make_client(lambda request: _json(200, {"v": next(versions)}))
+    kwargs = dict(cache_key="accounts:x", cache_ttl=10, stale_ttl=60)
+
+    assert await client.request("GET", "/GeneralLedger/Account", **kwargs) == {"v": 1}
+    clock.now += 30
+
+    assert await client.request("GET", "/GeneralLedger/Account", **kwargs) == {"v": 1}
+    await _settle(client)
+    assert await client.request("GET", "/GeneralLedger/Account", **kwargs) == {"v": 2}
+
+
+async def test_failed_refresh_keeps_serving_the_stale_value(make_client, clock):
+    statuses = itertools.chain([200], itertools.repeat(500))
+    client = make_client(lambda request: _json(next(statuses), {"v": 1}))
+    kwargs = dict(cache_key="accounts:x", cache_ttl=10, stale_ttl=60)
+
+    await client.request("GET", "/GeneralLedger/Account", **kwargs)
+    clock.now += 30
+    await client.request("GET", "/GeneralLedger/Account", **kwargs)
+    await _settle(client)
+
+    assert client._revalidating == {}
+    assert await client.request("GET", "/GeneralLedger/Account", **kwargs) == {"v": 1}
+    await _settle(client)
+
+
+# Conditional GETs
+
+
+def _etag_server(sent: list):
+    def handler(request):
+        sent.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return _json(200, {"UID": "1"}, ETag='"v1"')
+
+    return handler
+
+
+async def test_conditional_get_reuses_body_on_304(make_client):
+    sent = []
+    client = make_client(_etag_server(sent))
+
+    first = await client.request("GET", "/Sale/Invoice/1", conditional=True)
+    second = await client.request("GET", "/Sale/Invoice/1", conditional=True)
+
+    assert sent == [None, '"v1"']
+    assert second is first
+
+
+async def test_unconditional_get_ignores_stored_etag(make_client):
+    sent = []
+    client = make_client(_etag_server(sent))
+
+    await client.request("GET", "/Sale/Invoice/1", conditional=True)
+    result = await client.request("GET", "/Sale/Invoice/1")
+
+    assert sent == [None, None]
+    assert result == {"UID": "1"}
+
+
+async def test_etag_is_per_url_and_params(make_client):
+    sent = []
+    client = make_client(_etag_server(sent))
+
+    await client.request("GET", "/Sale/Invoice/1", conditional=True)
+    await client.request("GET", "/Sale/Invoice/2", conditional=True)
+    await client.request(
+        "GET", "/Sale/Invoice/1", params={"$select": "UID"}, conditional=True
+    )
+
+    assert sent == [None, None, None]
+
+
+async def test_304_without_stored_body_is_resent_unconditionally(make_client):
+    sent = []
+
+    def handler(request):
+        sent.append(request.headers.get("If-None-Match"))
+        if len(sent) == 1:
+            # e.g. a stale validator sent by a caller, or an evicted body
+            return httpx.Response(304)
+        return _json(200, {"UID": "1"}, ETag='"v2"')
+
+    client = make_client(handler)
+
+    assert await client.request("GET", "/Sale/Invoice/1", conditional=True) == {"UID": "1"}
+    assert sent == [None, None]
+
+
+async def test_repeated_304_without_stored_body_raises(make_client):
+    client = make_client(lambda request: httpx.Response(304))
+
+    with pytest.raises(MyobApiError) as exc_info:
+        await client.request("GET", "/Sale/Invoice/1", conditional=True)
+    assert exc_info.value.status_code == 304
+
+
+async def test_304_after_the_stored_body_is_invalidated(make_client):
+    sent = []
+
+    def handler(request):
+        sent.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            client.cache.invalidate()
+            return httpx.Response(304)
+        return _json(200, {"UID": "1"}, ETag='"v1"')
+
+    client = make_client(handler)
+
+    first = await client.request("GET", "/Sale/Invoice/1", conditional=True)
+    # The body read before sending is reused even though the cache was cleared
+    assert await client.request("GET", "/Sale/Invoice/1", conditional=True) is first
+    assert sent == [None, '"v1"']
+
+
+# Cache-Control
+
+
+@pytest.mark.parametrize(
+    "header, ttl, expected",
+    [
+        (None, 60, 60),
+        ("private", 60, 60),
+        ("no-store", 60, None),
+        ("max-age=10", 60, 10),
+        ("public, max-age=120", 60, 60),
+        ('max-age="5"', 60, 5),
+        ("max-age=soon", 60, 60),
+        ("max-age=10", None, None),
+    ],
+)
+def test_ttl_from_cache_control(header, ttl, expected):
+    assert _ttl_from_cache_control(header, ttl) == expected
+
+
+async def test_no_store_response_is_not_cached(make_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _json(200, {"v": len(calls)}, **{"Cache-Control": "no-store"})
+
+    client = make_client(handler)
+
+    await client.request("GET", "/Company", cache_key="company:x", cache_ttl=60)
+    await client.request("GET", "/Company", cache_key="company:x", cache_ttl=60)
+
+    assert len(calls) == 2
+
+
+async def test_max_age_caps_the_cache_ttl(make_client, clock):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _json(200, {"Items": []}, **{"Cache-Control": "max-age=5"})
+
+    client = make_client(handler)
+    kwargs = dict(cache_key="jobs:x", cache_ttl=60)
+
+    await client.request_paged("/GeneralLedger/Job", **kwargs)
+    clock.now += 4
+    await client.request_paged("/GeneralLedger/Job", **kwargs)
+    clock.now += 2
+    await client.request_paged("/GeneralLedger/Job", **kwargs)
+
+    assert len(calls) == 2
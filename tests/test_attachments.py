@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+from myob_mcp.tools.attachments import _validate_attachment
+
+PDF = base64.b64encode(b"%PDF-1.7\n" + bytes(range(64))).decode()
+PNG = base64.b64encode(b"\x89PNG\r\n\x1a\n" + bytes(64)).decode()
+
+
+@pytest.mark.parametrize("name, content", [("bill.pdf", PDF), ("scan.PNG", PNG)])
+def test_matching_signature_passes(name, content):
+    _validate_attachment(name, content)
+
+
+def test_mismatched_signature_is_rejected():
+    with pytest.raises(ValueError, match="claims .jpg but its content is PNG"):
+        _validate_attachment("photo.jpg", PNG)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "\n".join(PDF[i : i + 5] for i in range(0, len(PDF), 5)),  # MIME-style breaks
+        "  \r\n" + PDF[:7] + " " + PDF[7:],
+    ],
+)
+def test_whitespace_inside_the_data_is_ignored(content):
+    _validate_attachment("bill.pdf", content)
+    with pytest.raises(ValueError, match="content is PDF"):
+        _validate_attachment("bill.png", content)
+
+
+def test_unknown_signature_passes_through():
+    # e.g. a PDF with leading junk before %PDF
+    _validate_attachment("odd.pdf", base64.b64encode(b"junk%PDF-1.4" + bytes(32)).decode())
+
+
+def test_short_content_is_checked():
+    _validate_attachment("tiny.pdf", base64.b64encode(b"%PDF").decode())
+
+
+def test_data_url_prefix_is_rejected():
+    with pytest.raises(ValueError, match="without a 'data:"):
+        _validate_attachment("bill.pdf", "data:application/pdf;base64," + PDF)
+
+
+def test_invalid_base64_is_rejected():
+    with pytest.raises(ValueError, match="not valid base64"):
+        _validate_attachment("bill.pdf", "AB=C" + PDF)
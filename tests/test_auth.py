@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from myob_mcp.auth import MyobAuth
+from myob_mcp.config import MyobConfig
+
+
+@pytest.fixture
+def token_server() -> list[httpx.Request]:
+    """Token endpoint requests; each refresh hands out a numbered token."""
+    return []
+
+
+@pytest.fixture
+def auth(tmp_path, token_server) -> MyobAuth:
+    async def handler(request):
+        token_server.append(request)
+        # Let concurrent callers pile up behind the refresh
+        await asyncio.sleep(0)
+        n = len(token_server)
+        body = {
+            "access_token": f"access-{n}",
+            "refresh_token": f"refresh-{n}",
+            "expires_in": 1200,
+        }
+        return httpx.Response(200, json=body)
+
+    config = MyobConfig("client-id", "secret", token_path=str(tmp_path / "tokens.json"))
+    auth = MyobAuth(config, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    auth._apply_tokens({
+        "access_token": "access-0",
+        "refresh_token": "refresh-0",
+        "expires_at": time.time() - 10,
+    })
+    return auth
+
+
+async def test_concurrent_expired_callers_share_one_refresh(auth, token_server):
+    tokens = await asyncio.gather(*(auth.get_valid_token() for _ in range(10)))
+
+    assert len(token_server) == 1
+    assert set(tokens) == {"access-1"}
+
+
+async def test_concurrent_401s_share_one_refresh(auth, token_server):
+    rejected = auth._bearer
+
+    await asyncio.gather(*(auth.refresh_rejected_token(rejected) for _ in range(5)))
+
+    assert len(token_server) == 1
+    assert auth.get_bearer_sync() == "Bearer access-1"
+
+
+async def test_401_with_stale_bearer_does_not_refresh_again(auth, token_server):
+    stale = auth._bearer
+    await auth.get_valid_token()
+
+    await auth.refresh_rejected_token(stale)
+
+    assert len(token_server) == 1
+    assert auth.get_bearer_sync() == "Bearer access-1"
+
+
+async def test_manual_refresh_does_not_race_automatic_refresh(auth, token_server):
+    await asyncio.gather(auth.refresh_access_token(), auth.get_valid_token())
+
+    # The automatic refresh sees the manual one's token and doesn't reuse
+    # the already-rotated refresh token
+    assert len(token_server) == 1
+    assert b"refresh_token=refresh-0" in token_server[0].content
+
+
+posix_only = pytest.mark.skipif(os.name == "nt", reason="POSIX file modes")
+
+
+@posix_only
+async def test_token_file_is_private(auth, tmp_path):
+    await auth.refresh_access_token()
+
+    path = tmp_path / "tokens.json"
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert not (tmp_path / "tokens.json.tmp").exists()
+    assert b"refresh-1" in path.read_bytes()
+
+
+@posix_only
+def test_leftover_temp_file_is_replaced_privately(auth, tmp_path):
+    leftover = tmp_path / "tokens.json.tmp"
+    leftover.write_bytes(b"partial")
+    leftover.chmod(0o644)
+
+    auth._save_tokens({"access_token": "a", "refresh_token": "r"})
+
+    assert (tmp_path / "tokens.json").stat().st_mode & 0o777 == 0o600
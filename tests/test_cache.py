@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from myob_mcp.cache import TTLCache, make_key, make_key_prefix
+
+
+# Expiry and groups
+
+
+def test_entry_expires_after_its_ttl(clock):
+    cache = TTLCache()
+    cache.set("contacts:a", 1, ttl=10)
+
+    clock.now += 9
+    assert cache.get("contacts:a") == 1
+    clock.now += 1
+    assert cache.get("contacts:a") is None
+
+
+def test_expired_entries_are_evicted_without_being_read(clock):
+    cache = TTLCache()
+    for i in range(5):
+        cache.set(f"contacts:{i}", i, ttl=10)
+    cache.set("accounts:x", "x", ttl=100)
+
+    clock.now += 20
+    cache.set("jobs:y", "y", ttl=100)
+
+    assert set(cache._lru) == {"accounts:x", "jobs:y"}
+    assert "contacts:" not in cache._store
+
+
+def test_resetting_a_key_outlives_its_old_expiry(clock):
+    cache = TTLCache()
+    cache.set("contacts:a", 1, ttl=10)
+    clock.now += 5
+    cache.set("contacts:a", 2, ttl=10)
+
+    clock.now += 6
+    assert cache.get("contacts:a") == 2
+
+
+def test_invalidate_group_and_prefix():
+    cache = TTLCache()
+    customer = make_key("contacts", "/Contact/Customer", None)
+    supplier = make_key("contacts", "/Contact/Supplier", None)
+    cache.set(customer, 1)
+    cache.set(supplier, 2)
+    cache.set("invoices:x", 3)
+
+    cache.invalidate(make_key_prefix("contacts", "/Contact/Customer"))
+    assert cache.get(customer) is None
+    assert cache.get(supplier) == 2
+
+    cache.invalidate("contacts:")
+    assert cache.get(supplier) is None
+    assert cache.get("invoices:x") == 3
+
+    cache.invalidate()
+    assert cache.get("invoices:x") is None
+
+
+def test_make_key_tells_none_from_the_string():
+    assert make_key("jobs", None) != make_key("jobs", "None")
+    assert make_key("jobs", "a:b", 1).startswith(make_key_prefix("jobs", "a:b"))
+    assert not make_key("jobs", "a:bc", 1).startswith(make_key_prefix("jobs", "a:b"))
+
+
+# Size bound
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = TTLCache(max_size=3)
+    cache.set("contacts:a", 1)
+    cache.set("contacts:b", 2)
+    cache.set("jobs:c", 3)
+    assert cache.get("contacts:a") == 1
+
+    cache.set("jobs:d", 4)
+
+    assert cache.get("contacts:b") is None
+    assert [cache.get(k) for k in ("contacts:a", "jobs:c", "jobs:d")] == [1, 3, 4]
+    assert len(cache._lru) == 3
+
+
+def test_size_bound_holds_under_churn():
+    cache = TTLCache(max_size=10)
+    for i in range(100):
+        cache.set(f"group{i % 7}:{i}", i)
+
+    assert len(cache._lru) == 10
+    assert sum(len(bucket) for bucket in cache._store.values()) == 10
+    assert cache.get("group1:99") == 99
+
+
+def test_expiry_heap_stays_bounded(clock):
+    cache = TTLCache(max_size=10)
+    for i in range(1000):
+        cache.set(f"contacts:{i % 25}", i, ttl=3600)
+        cache.set(f"jobs:{i}", i, ttl=3600)
+        if i % 100 == 0:
+            cache.invalidate("contacts:")
+
+    assert len(cache._expiry_heap) <= 2 * 10
+    assert cache.get("jobs:999") == 999
+
+
+def test_rebuilt_heap_still_expires_entries(clock):
+    cache = TTLCache(max_size=4)
+    for i in range(20):
+        cache.set(f"jobs:{i}", i, ttl=10 + i)
+
+    # Live: jobs:16..19, expiring 26..29 seconds from the start
+    clock.now += 27
+    cache.set("accounts:x", "x", ttl=100)
+
+    assert set(cache._lru) == {"jobs:18", "jobs:19", "accounts:x"}
+
+
+# Stale-while-revalidate
+
+
+def test_get_swr_serves_stale_entries_until_stale_ttl_ends(clock):
+    cache = TTLCache()
+    cache.set("accounts:a", 1, ttl=10, stale_ttl=20)
+
+    assert cache.get_swr("accounts:a") == (1, False)
+    clock.now += 15
+    assert cache.get("accounts:a") is None
+    assert cache.get_swr("accounts:a") == (1, True)
+    clock.now += 15
+    assert cache.get_swr("accounts:a") == (None, False)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import httpx
+
+from myob_mcp.tools import contacts
+
+from .conftest import context, tool
+
+
+async def test_create_contact_drops_only_lists_it_can_appear_in(make_client):
+    gets = []
+
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(201, json={"UID": "new", "URI": "x"})
+        gets.append(request.url.path.rsplit("/cf-1", 1)[1])
+        return httpx.Response(200, json={"Items": [], "Count": 0})
+
+    client = make_client(handler)
+    ctx = context(client)
+    list_contacts = tool(contacts, "list_contacts")
+    types = ("Customer", None, "Supplier")
+
+    for contact_type in types:
+        await list_contacts(ctx, contact_type=contact_type)
+    assert gets == ["/Contact/Customer", "/Contact", "/Contact/Supplier"]
+
+    await tool(contacts, "create_contact")(ctx, "Acme", "Customer")
+    gets.clear()
+    for contact_type in types:
+        await list_contacts(ctx, contact_type=contact_type)
+
+    # The supplier list is still served from the cache
+    assert gets == ["/Contact/Customer", "/Contact"]
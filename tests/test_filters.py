@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import pytest
+
+from myob_mcp.tools import _filters
+from myob_mcp.tools._filters import (
+    INVOICE_DETAIL_FIELDS,
+    date_filters,
+    fix_subtotal,
+    pick,
+    pick_list,
+    strip_metadata,
+    validate_date,
+)
+
+
+# Dates
+
+
+@pytest.mark.parametrize("value", ["2024-02-29", "2023-12-31", "0001-01-01"])
+def test_validate_date_accepts_real_dates(value):
+    assert validate_date(value, "date_from") == value
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2024-02-30",  # impossible day
+        "2023-02-29",  # not a leap year
+        "2024-13-01",
+        "2024-1-01",  # wrong lengths
+        "2024-01-011",
+        "24-01-01",
+        "",
+        "2024/01/01",
+        "20240101xx",
+        "２０２４-01-01",  # non-ASCII digits
+        "2024-0١-01",
+    ],
+)
+def test_validate_date_rejects(value):
+    with pytest.raises(ValueError, match="Expected YYYY-MM-DD"):
+        validate_date(value, "date_from")
+
+
+def test_date_filters_builds_clauses():
+    assert date_filters("2024-01-01", None) == ["Date ge datetime'2024-01-01'"]
+    with pytest.raises(ValueError, match="date_to"):
+        date_filters(None, "2024-02-30")
+
+
+def test_fix_subtotal_corrects_tax_inclusive_copy():
+    item = {"IsTaxInclusive": True, "Subtotal": 110.0, "TotalAmount": 110.0, "TotalTax": 10.0}
+
+    fixed = fix_subtotal(item)
+
+    assert fixed["Subtotal"] == 100.0
+    assert item["Subtotal"] == 110.0
+
+
+def test_fix_subtotal_leaves_tax_exclusive_alone():
+    item = {"IsTaxInclusive": False, "Subtotal": 100.0, "TotalAmount": 110.0, "TotalTax": 10.0}
+
+    assert fix_subtotal(item) is item
+
+
+def test_strip_metadata_returns_a_copy():
+    obj = {"UID": "1", "URI": "https://x", "RowVersion": "7", "Name": "A"}
+
+    assert strip_metadata(obj) == {"UID": "1", "Name": "A"}
+    assert "URI" in obj and "RowVersion" in obj
+
+
+# Generated pickers
+
+
+def test_pick_keeps_whitelisted_fields_in_spec_order():
+    spec = {"b": True, "a": True, "ref": {"UID": True}, "lines": {"x": True}}
+    obj = {
+        "a": 1,
+        "b": 2,
+        "junk": 3,
+        "ref": {"UID": "u", "URI": "x"},
+        "lines": [{"x": 1, "y": 2}, "not a dict", {"y": 3}],
+    }
+
+    picked = pick(obj, spec)
+
+    assert picked == {"b": 2, "a": 1, "ref": {"UID": "u"}, "lines": [{"x": 1}, {}]}
+    assert list(picked) == ["b", "a", "ref", "lines"]
+
+
+def test_flat_picker_handles_missing_keys():
+    spec = {"a": True, "b": True}
+
+    assert pick_list([{"a": 1, "b": 2}, {"a": 3}], spec) == [{"a": 1, "b": 2}, {"a": 3}]
+
+
+def test_pick_ignores_non_dict_nested_values():
+    assert pick({"ref": None, "lines": "x"}, {"ref": {"UID": True}, "lines": {"x": True}}) == {}
+
+
+def test_field_specs_are_compiled_at_import():
+    entry = _filters._pickers[id(INVOICE_DETAIL_FIELDS)]
+    assert entry[0] is INVOICE_DETAIL_FIELDS
+    assert id(INVOICE_DETAIL_FIELDS) not in _filters._adhoc_pickers
+
+
+def test_adhoc_pickers_are_reused_and_bounded():
+    spec = {"a": True}
+    first = _filters._compile_spec(spec)
+    assert _filters._compile_spec(spec) is first
+
+    for i in range(_filters._ADHOC_PICKERS_MAX + 10):
+        assert pick({f"k{i}": i}, {f"k{i}": True}) == {f"k{i}": i}
+
+    assert len(_filters._adhoc_pickers) <= _filters._ADHOC_PICKERS_MAX
+    assert id(spec) not in _filters._adhoc_pickers
+    assert id(INVOICE_DETAIL_FIELDS) in _filters._pickers
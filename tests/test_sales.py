@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from myob_mcp.cache import make_key
+from myob_mcp.tools import _sales, activity, invoices, sales_orders
+
+from .conftest import context, tool
+
+INVOICES = [
+    {"UID": "i1", "Number": "00001", "InvoiceType": "Service", "Junk": 1},
+    {"UID": "i2", "Number": "00002", "InvoiceType": "Item"},
+]
+ORDERS = [{"UID": "o1", "Number": "SO1", "OrderType": "Item"}]
+
+
+def _sales_handler(calls: list):
+    def handler(request):
+        calls.append(request.url.path)
+        items = INVOICES if request.url.path.endswith("/Sale/Invoice") else ORDERS
+        return httpx.Response(200, json={"Items": items, "Count": len(items)})
+
+    return handler
+
+
+async def test_recent_activity_records_layouts(make_client):
+    calls = []
+    client = make_client(_sales_handler(calls))
+
+    result = await tool(activity, "list_recent_activity")(context(client))
+
+    assert [i["UID"] for i in result["invoices"]] == ["i1", "i2"]
+    assert "Junk" not in result["invoices"][0]
+    assert [o["UID"] for o in result["sales_orders"]] == ["o1"]
+    assert client.cache.get(make_key("invoice_layout", "i1")) == "Service"
+    assert client.cache.get(make_key("sales_order_layout", "o1")) == "Item"
+
+
+async def test_recent_activity_shares_list_tool_cache(make_client):
+    calls = []
+    client = make_client(_sales_handler(calls))
+    ctx = context(client)
+
+    listed = await tool(invoices, "list_invoices")(ctx, date_from="2024-01-01")
+    await tool(sales_orders, "list_sales_orders")(ctx, date_from="2024-01-01")
+    recent = await tool(activity, "list_recent_activity")(ctx, date_from="2024-01-01")
+
+    assert len(calls) == 2
+    assert recent["invoices"] is listed
+
+
+def test_list_transform_is_stable_per_document_and_cache(make_client):
+    cache = make_client(lambda request: httpx.Response(200)).cache
+
+    transform = _sales._list_transform(_sales.INVOICE, cache)
+    assert _sales._list_transform(_sales.INVOICE, cache) is transform
+    assert _sales._list_transform(_sales.SALES_ORDER, cache) is not transform
+
+
+def _document_handler(calls: list, base: str, type_field: str, layout: str):
+    """Serve a summary at ``base/{id}`` and full detail at ``base/{layout}/{id}``."""
+
+    def handler(request):
+        path = request.url.path
+        calls.append(path.split(base, 1)[1])
+        if path.endswith(f"{base}/doc-1"):
+            return httpx.Response(200, json={"UID": "doc-1", type_field: layout})
+        if path.endswith(f"{base}/{layout}/doc-1"):
+            return httpx.Response(
+                200,
+                json={
+                    "UID": "doc-1",
+                    "Number": "00042",
+                    type_field: layout,
+                    "IsTaxInclusive": True,
+                    "Subtotal": 110.0,
+                    "TotalAmount": 110.0,
+                    "TotalTax": 10.0,
+                    "Lines": [{"Description": "Work", "Total": 110.0}],
+                },
+            )
+        return httpx.Response(404, text="wrong layout")
+
+    return handler
+
+
+DOCUMENT_TOOLS = [
+    (invoices, "get_invoice", "/Sale/Invoice", "InvoiceType", "invoice_layout"),
+    (sales_orders, "get_sales_order", "/Sale/Order", "OrderType", "sales_order_layout"),
+]
+
+
+@pytest.mark.parametrize("layout", ["Item", "Service"])
+@pytest.mark.parametrize("module, name, base, type_field, layout_group", DOCUMENT_TOOLS)
+async def test_get_document_discovers_layout(
+    make_client, module, name, base, type_field, layout_group, layout
+):
+    calls = []
+    client = make_client(_document_handler(calls, base, type_field, layout))
+
+    result = await tool(module, name)(context(client), "doc-1")
+
+    # Summary first, then only the layout it names
+    assert calls == ["/doc-1", f"/{layout}/doc-1"]
+    assert result["Number"] == "00042"
+    assert result["Subtotal"] == 100.0
+    assert result["Lines"]
+    assert client.cache.get(make_key(layout_group, "doc-1")) == layout
+
+
+@pytest.mark.parametrize("module, name, base, type_field, layout_group", DOCUMENT_TOOLS)
+async def test_get_document_uses_remembered_layout(
+    make_client, module, name, base, type_field, layout_group
+):
+    calls = []
+    client = make_client(_document_handler(calls, base, type_field, "Service"))
+    client.cache.set(make_key(layout_group, "doc-1"), "Service", 60)
+
+    result = await tool(module, name)(context(client), "doc-1")
+
+    assert calls == ["/Service/doc-1"]
+    assert result["UID"] == "doc-1"
+
+
+OPEN_ORDER = {
+    "UID": "o1",
+    "URI": "https://api.example/Sale/Order/Item/o1",
+    "Number": "SO1",
+    "Status": "Open",
+    "Layout": "Item",
+    "Date": "2024-01-01T00:00:00",
+    "Customer": {"UID": "c1", "URI": "https://api.example/Contact/Customer/c1"},
+    "Comment": "old",
+    "RowVersion": "7",
+}
+
+
+def _order_handler(calls: list, puts: list):
+    """Serve OPEN_ORDER and record the body of each PUT."""
+
+    def handler(request):
+        calls.append((request.method, request.url.path.split("/Sale/Order", 1)[1]))
+        if request.method == "PUT":
+            puts.append(json.loads(request.content))
+            return httpx.Response(200, json={"UID": "o1", "Number": "SO1"})
+        return httpx.Response(200, json=OPEN_ORDER)
+
+    return handler
+
+
+async def test_edit_sales_order_without_changes_sends_no_put(make_client):
+    calls, puts = [], []
+    client = make_client(_order_handler(calls, puts))
+    client.cache.set("sales_orders:list", ["cached"])
+
+    result = await tool(sales_orders, "edit_sales_order")(context(client), "o1")
+
+    assert calls == [("GET", "/o1")]
+    assert puts == []
+    assert result["UID"] == "o1"
+    assert client.cache.get("sales_orders:list") == ["cached"]
+
+
+async def test_edit_sales_order_puts_the_changed_field(make_client):
+    calls, puts = [], []
+    client = make_client(_order_handler(calls, puts))
+    client.cache.set("sales_orders:list", ["cached"])
+
+    result = await tool(sales_orders, "edit_sales_order")(
+        context(client), "o1", comment="new"
+    )
+
+    assert calls == [("GET", "/o1"), ("PUT", "/Item/o1")]
+    [body] = puts
+    assert body["Comment"] == "new"
+    assert body["RowVersion"] == "7"
+    assert body["Customer"] == {"UID": "c1"}
+    assert "Status" not in body
+    assert result["UID"] == "o1"
+    assert client.cache.get("sales_orders:list") is None
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+
+from myob_mcp.tools import register_all_tools
+
+
+def _register(disabled=()) -> list[str]:
+    """Register the tools and return every name passed to add_tool, in order.
+
+    FastMCP keeps only the first of two same-named tools, so duplicates are
+    counted at add_tool rather than read back from the server.
+    """
+    mcp = FastMCP("test")
+    manager = mcp._tool_manager
+    names: list[str] = []
+    add_tool = manager.add_tool
+
+    def record(fn, name=None, **kwargs):
+        tool = add_tool(fn, name=name, **kwargs)
+        names.append(tool.name)
+        return tool
+
+    manager.add_tool = record
+    register_all_tools(mcp, disabled=disabled)
+    assert sorted(names) == sorted(t.name for t in manager.list_tools())
+    return names
+
+
+@pytest.mark.parametrize("disabled", [(), ("attachments", "jobs"), ("oauth",)])
+def test_every_tool_is_registered_once(disabled):
+    names = _register(disabled=disabled)
+
+    assert names
+    assert len(names) == len(set(names))
+
+
+def test_disabling_groups_only_removes_their_tools():
+    everything = set(_register())
+    remaining = set(_register(disabled={"jobs", "oauth"}))
+
+    assert remaining < everything
+    assert {"oauth_authorize", "oauth_refresh", "oauth_status"} <= everything - remaining
+    assert not {n for n in remaining if n.startswith("oauth_")}
+
+
+def test_disabled_group_is_not_imported(monkeypatch: pytest.MonkeyPatch):
+    for name in ("invoices", "activity"):
+        monkeypatch.delitem(sys.modules, f"myob_mcp.tools.{name}", raising=False)
+
+    names = _register(disabled={"invoices"})
+
+    assert "myob_mcp.tools.invoices" not in sys.modules
+    # activity depends on invoices, so it is skipped (and not imported) too
+    assert "myob_mcp.tools.activity" not in sys.modules
+    assert "list_invoices" not in names
+    assert "list_recent_activity" not in names
+    assert "list_sales_orders" in names
+
+
+def test_unknown_group_is_rejected():
+    with pytest.raises(ValueError, match="Unknown tool group"):
+        _register(disabled={"nope"})